@@ -1,7 +1,10 @@
+import time
+_inicio_pagina = time.perf_counter()
 import streamlit as st
 from styles import load_styles
 import utils
-import pandas as pd
+from datetime import datetime
+import pytz
 
 # 1. Configuración de página
 load_styles()
@@ -51,49 +54,50 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# --- CÁLCULO DE MÉTRICAS (DATA REAL) ---
-try:
-    df = utils.cargar_directorio_csv()
-except:
-    df = pd.DataFrame()
-
-if not df.empty:
-    total_alumnos = len(df)
-    total_colegios = df['institucion'].nunique()
-    total_ugel = df['ugel'].nunique()
-else:
-    total_alumnos = 0
-    total_colegios = 0
-    total_ugel = 0
-
 # --- TARJETAS DE ESTADÍSTICAS (KPIs) ---
-kpi1, kpi2, kpi3 = st.columns(3)
+# Se dibujan vacías y se llenan al final de la página: leer el padrón abre
+# Firestore, así que el menú aparece antes de esa lectura.
+ETIQUETAS_KPI = ["Estudiantes Inscritos", "Instituciones Educativas", "UGELs Participantes"]
 
-with kpi1:
-    st.markdown(f"""
+def tarjeta_kpi(espacio, valor, etiqueta):
+    espacio.markdown(f"""
     <div class="metric-card">
-        <div class="metric-value">{total_alumnos}</div>
-        <div class="metric-label">Estudiantes Inscritos</div>
+        <div class="metric-value">{valor}</div>
+        <div class="metric-label">{etiqueta}</div>
     </div>
     """, unsafe_allow_html=True)
 
-with kpi2:
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{total_colegios}</div>
-        <div class="metric-label">Instituciones Educativas</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with kpi3:
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{total_ugel}</div>
-        <div class="metric-label">UGELs Participantes</div>
-    </div>
-    """, unsafe_allow_html=True)
+espacios_kpi = [col.empty() for col in st.columns(3)]
+for espacio, etiqueta in zip(espacios_kpi, ETIQUETAS_KPI):
+    tarjeta_kpi(espacio, "…", etiqueta)
 
 st.write("") 
+
+# --- ESTADO DE LA COLA DE ENVÍO A LA NUBE ---
+@st.fragment(run_every="10s")
+def estado_envios():
+    estado = utils.estado_cola()
+    pendientes = estado["pendientes"]
+    ultimo = "—"
+    if estado["ultimo_envio"]:
+        ultimo = datetime.fromtimestamp(estado["ultimo_envio"], pytz.timezone('America/Lima')).strftime("%H:%M:%S")
+    if estado["ultimo_error"]:
+        st.warning(f"📤 Cola de envío: **{pendientes}** exámenes pendientes · sin conexión con Firestore, reintentando… ({estado['ultimo_error']})")
+    elif pendientes:
+        st.info(f"📤 Cola de envío: **{pendientes}** exámenes pendientes · último envío {ultimo}")
+    else:
+        st.caption(f"☁️ Todos los exámenes están guardados en la nube · último envío {ultimo}")
+
+    # Modo sede (almacén local): traer a mano lo que cambió en la nube
+    if utils.es_local():
+        if st.button("🔄 Traer cambios de la nube", key="btn_sincronizar_nube"):
+            try:
+                utils.sincronizar_desde_nube()
+                st.toast("☁️ Clave, padrón y resultados actualizados desde la nube.")
+            except Exception as e:
+                st.error(f"No se pudo sincronizar: {e}")
+
+estado_envios()
 st.write("") 
 
 # --- MENÚ DE NAVEGACIÓN ---
@@ -161,6 +165,49 @@ with col5:
     if st.button("Gestionar Directorio", key="btn_directorio", use_container_width=True):
         st.switch_page("pages/Directorio.py")
 
+with col6:
+    st.markdown("""
+        <div class="nav-card">
+            <span class="nav-icon">🏅</span>
+            <div class="nav-title">Ranking por Categoría</div>
+            <div class="nav-desc">Vista para jurados: consulta paginada de una categoría o grado.</div>
+        </div>
+    """, unsafe_allow_html=True)
+    if st.button("Ver Ranking", key="btn_ranking", use_container_width=True):
+        st.switch_page("pages/Ranking.py")
+
+st.write("")
+
+col7, col8 = st.columns(2)
+
+with col7:
+    st.markdown("""
+        <div class="nav-card">
+            <span class="nav-icon">📥</span>
+            <div class="nav-title">Importación Masiva</div>
+            <div class="nav-desc">Carga hojas escaneadas (CSV/XLSX), revisa la simulación y guarda por lotes.</div>
+        </div>
+    """, unsafe_allow_html=True)
+    if st.button("Importar Hojas", key="btn_importar", use_container_width=True):
+        st.switch_page("pages/Importar.py")
+
+# --- TIEMPOS DE ARRANQUE DEL SERVIDOR ---
+utils.registrar_arranque("Primera carga del inicio", time.perf_counter() - _inicio_pagina)
+with st.expander("⏱️ Tiempos de arranque del servidor"):
+    for etapa, segundos in utils.TIEMPOS_ARRANQUE.items():
+        st.caption(f"{etapa}: {1000 * segundos:,.0f} ms")
+
+# --- CÁLCULO DE MÉTRICAS (DATA REAL) ---
+# Con el mapa del padrón (dicts) el inicio no necesita importar pandas
+mapa_directorio = utils.cargar_mapa_directorio()
+totales = [
+    len(mapa_directorio),
+    len({a["institucion"] for a in mapa_directorio.values()} - {""}),
+    len({a["ugel"] for a in mapa_directorio.values()} - {""}),
+]
+for espacio, valor, etiqueta in zip(espacios_kpi, totales, ETIQUETAS_KPI):
+    tarjeta_kpi(espacio, valor, etiqueta)
+
 # --- FOOTER ---
 st.markdown("---")
 st.markdown("""
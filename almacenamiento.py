@@ -0,0 +1,281 @@
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+import pytz
+from cola_registros import serializar, deserializar
+
+# ==========================================
+# ALMACENES DE DATOS (BACKENDS)
+# ==========================================
+# utils habla con un almacén principal a través de estos métodos:
+#   leer_configuracion / guardar_configuracion
+#   agregar_historial / leer_historial
+#   leer_directorio / guardar_directorio
+#   leer_participantes / leer_participante / escribir_participantes
+#   consultar_ranking
+# AlmacenFirestore es el de siempre (la nube). AlmacenSQLite es un archivo
+# local para operar en la sede sin depender de la red; sus escrituras se
+# replican a Firestore mediante la cola de cola_registros.py. El SDK de Firebase
+# se importa dentro de los métodos para no cargarlo al importar utils.
+DOC_CONFIGURACION = 'respuestas_oficiales'
+
+def _proyectar(datos, campos):
+    return datos if campos is None else {k: datos[k] for k in campos if k in datos}
+
+def _con_marca(registro, ahora):
+    """Reemplaza SERVER_TIMESTAMP (solo tiene sentido en Firestore) por la hora local."""
+    # Si el SDK no está cargado no puede haber SERVER_TIMESTAMP: en modo solo
+    # SQLite no se importa firebase_admin por esto
+    firestore = sys.modules.get("google.cloud.firestore_v1")
+    if firestore is None: return registro
+    return {k: (ahora if v is firestore.SERVER_TIMESTAMP else v) for k, v in registro.items()}
+
+class AlmacenFirestore:
+    """Firestore: colecciones configuracion, historial_cambios, directorio_alumnos y participantes."""
+    local = False
+
+    def __init__(self, db):
+        self.db = db
+
+    # --- Configuración e historial ---
+    def leer_configuracion(self):
+        doc = self.db.collection('configuracion').document(DOC_CONFIGURACION).get()
+        return doc.to_dict() if doc.exists else None
+
+    def guardar_configuracion(self, config):
+        self.db.collection('configuracion').document(DOC_CONFIGURACION).set(config)
+
+    def agregar_historial(self, evento, doc_id=None):
+        self.db.collection('historial_cambios').document(doc_id or uuid.uuid4().hex).set(evento)
+
+    def leer_historial(self, limite=50):
+        from firebase_admin import firestore
+        consulta = self.db.collection('historial_cambios').order_by('timestamp', direction=firestore.Query.DESCENDING)
+        return [doc.to_dict() for doc in consulta.limit(limite).stream()]
+
+    # --- Directorio ---
+    def leer_directorio(self, dnis=None):
+        """dni -> alumno. Con dnis solo esos (los que no existen no aparecen)."""
+        coleccion = self.db.collection('directorio_alumnos')
+        if dnis is None:
+            return {doc.id: doc.to_dict() for doc in coleccion.stream()}
+        docs = self.db.get_all([coleccion.document(d) for d in dnis])
+        return {doc.id: doc.to_dict() for doc in docs if doc.exists}
+
+    def guardar_directorio(self, directorio, reemplazar=False):
+        """Con reemplazar=True también borra los alumnos que no están en 'directorio'."""
+        coleccion = self.db.collection('directorio_alumnos')
+        pendientes = [(coleccion.document(dni), alumno) for dni, alumno in directorio.items()]
+        if reemplazar:
+            sobrantes = [doc.reference for doc in coleccion.select([]).stream() if doc.id not in directorio]
+            pendientes += [(ref, None) for ref in sobrantes]
+        for inicio in range(0, len(pendientes), 450):
+            batch = self.db.batch()
+            for ref, alumno in pendientes[inicio:inicio + 450]:
+                if alumno is None: batch.delete(ref)
+                else: batch.set(ref, alumno)
+            batch.commit()
+
+    # --- Participantes ---
+    def leer_participantes(self, campos=None, desde=None, categoria=None, dnis=None):
+        """dni -> documento; desde = solo modificados después; campos = proyección."""
+        coleccion = self.db.collection('participantes')
+        if dnis is not None:
+            refs = [coleccion.document(d) for d in dnis]
+            docs = self.db.get_all(refs, field_paths=list(campos)) if campos else self.db.get_all(refs)
+            return {doc.id: doc.to_dict() for doc in docs if doc.exists}
+        consulta = coleccion
+        if categoria is not None: consulta = consulta.where('categoria', '==', categoria)
+        if desde is not None: consulta = consulta.where('actualizado_en', '>', desde)
+        if campos is not None: consulta = consulta.select(list(campos))
+        return {doc.id: doc.to_dict() for doc in consulta.stream()}
+
+    def leer_participante(self, dni):
+        doc = self.db.collection('participantes').document(dni).get()
+        return doc.to_dict() if doc.exists else None
+
+    def escribir_participantes(self, lote, solo_campos=None):
+        """lote = [(dni, registro | None)]; None borra. solo_campos = actualizar solo esos campos."""
+        coleccion = self.db.collection('participantes')
+        batch = self.db.batch()
+        for dni, registro in lote:
+            ref = coleccion.document(dni)
+            if registro is None:
+                batch.delete(ref)
+            elif solo_campos:
+                batch.update(ref, {k: registro[k] for k in solo_campos})
+            else:
+                batch.set(ref, registro)
+        batch.commit()
+
+    def consultar_ranking(self, categoria=None, grado=None, tamano=50, despues_de=None, campos=None):
+        """(filas, cursor_siguiente); el cursor es el último documento de la página."""
+        from firebase_admin import firestore
+        consulta = self.db.collection('participantes')
+        if categoria: consulta = consulta.where('categoria', '==', categoria)
+        if grado: consulta = consulta.where('grado', '==', grado)
+        # Empates de clave_orden por DNI ascendente, igual que IndiceRanking y SQLite
+        # (sin esto Firestore desempata por id en el sentido del último order_by)
+        consulta = consulta.order_by('clave_orden', direction=firestore.Query.DESCENDING).order_by('__name__')
+        if campos is not None: consulta = consulta.select(list(campos))
+        if despues_de is not None: consulta = consulta.start_after(despues_de)
+        docs = list(consulta.limit(tamano).stream())
+        cursor = docs[-1] if len(docs) == tamano else None
+        return [doc.to_dict() for doc in docs], cursor
+
+class AlmacenSQLite:
+    """Archivo SQLite local con índices por dni, categoría/grado y clave_orden."""
+    local = True
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        with self.lock, self.con:
+            self.con.executescript("""
+                CREATE TABLE IF NOT EXISTS configuracion (id TEXT PRIMARY KEY, datos TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS historial (id TEXT PRIMARY KEY, momento REAL NOT NULL, datos TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_historial_momento ON historial (momento DESC);
+                CREATE TABLE IF NOT EXISTS directorio (dni TEXT PRIMARY KEY, datos TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS participantes (
+                    dni TEXT PRIMARY KEY,
+                    categoria TEXT,
+                    grado TEXT,
+                    clave_orden INTEGER,
+                    actualizado REAL NOT NULL,
+                    datos TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_part_orden ON participantes (clave_orden DESC, dni);
+                CREATE INDEX IF NOT EXISTS idx_part_categoria ON participantes (categoria, clave_orden DESC, dni);
+                CREATE INDEX IF NOT EXISTS idx_part_grado ON participantes (grado, clave_orden DESC, dni);
+                CREATE INDEX IF NOT EXISTS idx_part_actualizado ON participantes (actualizado);
+            """)
+
+    def _consultar(self, sql, parametros=()):
+        with self.lock:
+            return self.con.execute(sql, parametros).fetchall()
+
+    def _escribir(self, sql, filas):
+        with self.lock, self.con:
+            self.con.executemany(sql, filas)
+
+    def vacio(self):
+        return not self._consultar("SELECT 1 FROM directorio LIMIT 1")
+
+    # --- Configuración e historial ---
+    def leer_configuracion(self):
+        filas = self._consultar("SELECT datos FROM configuracion WHERE id = ?", (DOC_CONFIGURACION,))
+        return deserializar(filas[0][0]) if filas else None
+
+    def guardar_configuracion(self, config):
+        self._escribir("INSERT OR REPLACE INTO configuracion (id, datos) VALUES (?, ?)",
+                       [(DOC_CONFIGURACION, serializar(config))])
+
+    def agregar_historial(self, evento, doc_id=None):
+        marca = evento.get("timestamp")
+        momento = marca.timestamp() if isinstance(marca, datetime) else time.time()
+        self._escribir("INSERT OR REPLACE INTO historial (id, momento, datos) VALUES (?, ?, ?)",
+                       [(doc_id or uuid.uuid4().hex, momento, serializar(evento))])
+
+    def leer_historial(self, limite=50):
+        filas = self._consultar("SELECT datos FROM historial ORDER BY momento DESC LIMIT ?", (limite,))
+        return [deserializar(f[0]) for f in filas]
+
+    # --- Directorio ---
+    def leer_directorio(self, dnis=None):
+        if dnis is None:
+            filas = self._consultar("SELECT dni, datos FROM directorio")
+        else:
+            dnis = list(dnis)
+            filas = []
+            for inicio in range(0, len(dnis), 500):
+                parte = dnis[inicio:inicio + 500]
+                filas += self._consultar(f"SELECT dni, datos FROM directorio WHERE dni IN ({','.join('?' * len(parte))})", parte)
+        return {dni: deserializar(datos) for dni, datos in filas}
+
+    def guardar_directorio(self, directorio, reemplazar=False):
+        with self.lock, self.con:
+            if reemplazar: self.con.execute("DELETE FROM directorio")
+            self.con.executemany("INSERT OR REPLACE INTO directorio (dni, datos) VALUES (?, ?)",
+                                 [(dni, serializar(alumno)) for dni, alumno in directorio.items()])
+
+    # --- Participantes ---
+    def _filas_a_docs(self, filas, campos):
+        docs = {}
+        for dni, actualizado, datos in filas:
+            doc = deserializar(datos)
+            doc["actualizado_en"] = datetime.fromtimestamp(actualizado, pytz.utc)
+            docs[dni] = _proyectar(doc, campos)
+        return docs
+
+    def leer_participantes(self, campos=None, desde=None, categoria=None, dnis=None):
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("actualizado > ?"); parametros.append(desde.timestamp())
+        if categoria is not None:
+            condiciones.append("categoria = ?"); parametros.append(categoria)
+        if dnis is not None:
+            dnis = list(dnis)
+            condiciones.append(f"dni IN ({','.join('?' * len(dnis))})"); parametros += dnis
+        sql = "SELECT dni, actualizado, datos FROM participantes"
+        if condiciones: sql += " WHERE " + " AND ".join(condiciones)
+        return self._filas_a_docs(self._consultar(sql, parametros), campos)
+
+    def leer_participante(self, dni):
+        return self.leer_participantes(dnis=[dni]).get(dni)
+
+    def escribir_participantes(self, lote, solo_campos=None):
+        ahora = time.time()
+        marca = datetime.fromtimestamp(ahora, pytz.utc)
+        with self.lock, self.con:
+            for dni, registro in lote:
+                if registro is None:
+                    self.con.execute("DELETE FROM participantes WHERE dni = ?", (dni,))
+                    continue
+                registro = _con_marca(registro, marca)
+                if solo_campos:
+                    fila = self.con.execute("SELECT datos FROM participantes WHERE dni = ?", (dni,)).fetchone()
+                    if fila is None: continue
+                    registro = {**deserializar(fila[0]), **{k: registro[k] for k in solo_campos}}
+                registro.pop("actualizado_en", None)  # va en la columna 'actualizado'
+                self.con.execute(
+                    "INSERT OR REPLACE INTO participantes (dni, categoria, grado, clave_orden, actualizado, datos) VALUES (?, ?, ?, ?, ?, ?)",
+                    (dni, registro.get("categoria"), registro.get("grado"), registro.get("clave_orden"), ahora, serializar(registro)))
+
+    def reemplazar_participantes(self, participantes, conservar=()):
+        """Copia completa desde la nube; los DNIs de 'conservar' (pendientes de subir) no se tocan."""
+        conservar = set(conservar)
+        with self.lock, self.con:
+            actuales = [fila[0] for fila in self.con.execute("SELECT dni FROM participantes")]
+            self.con.executemany("DELETE FROM participantes WHERE dni = ?",
+                                 [(dni,) for dni in actuales if dni not in participantes and dni not in conservar])
+        ahora = time.time()
+        filas = []
+        for dni, registro in participantes.items():
+            if dni in conservar: continue
+            marca = registro.get("actualizado_en")
+            registro = {k: v for k, v in registro.items() if k != "actualizado_en"}
+            filas.append((dni, registro.get("categoria"), registro.get("grado"), registro.get("clave_orden"),
+                          marca.timestamp() if isinstance(marca, datetime) else ahora, serializar(registro)))
+        self._escribir("INSERT OR REPLACE INTO participantes (dni, categoria, grado, clave_orden, actualizado, datos) VALUES (?, ?, ?, ?, ?, ?)", filas)
+
+    def consultar_ranking(self, categoria=None, grado=None, tamano=50, despues_de=None, campos=None):
+        """(filas, cursor_siguiente); el cursor es (clave_orden, dni) de la última fila."""
+        condiciones, parametros = [], []
+        if categoria:
+            condiciones.append("categoria = ?"); parametros.append(categoria)
+        if grado:
+            condiciones.append("grado = ?"); parametros.append(grado)
+        if despues_de is not None:
+            orden, dni = despues_de
+            condiciones.append("(clave_orden < ? OR (clave_orden = ? AND dni > ?))"); parametros += [orden, orden, dni]
+        sql = "SELECT dni, actualizado, datos, clave_orden FROM participantes"
+        if condiciones: sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY clave_orden DESC, dni LIMIT ?"
+        filas = self._consultar(sql, parametros + [tamano])
+        docs = self._filas_a_docs([f[:3] for f in filas], campos)
+        cursor = (filas[-1][3], filas[-1][0]) if len(filas) == tamano else None
+        return [docs[f[0]] for f in filas], cursor
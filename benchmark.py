@@ -0,0 +1,267 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ==========================================
+# BENCHMARK DEL CAMINO DE DATOS
+# ==========================================
+# Mide las funciones de utils con 1k / 10k / 50k participantes sintéticos
+# (datos_sinteticos.py) contra Firestore en memoria o el emulador. Por etapa
+# reporta latencia (mejor y mediana), rendimiento y memoria pico.
+#
+#   python benchmark.py                               # 1k, 10k y 50k en memoria
+#   python benchmark.py --tamanos 1000 --json base.json
+#   python benchmark.py --comparar base.json          # sale con 1 si algo empeoró
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmark.py --emulador
+#
+# Las variables de entorno se fijan antes de importar utils: la conexión a
+# Firestore se resuelve al importar el módulo.
+TAMANOS = (1000, 10000, 50000)
+TOLERANCIA = 0.20  # +20% sobre la mediana de referencia = regresión
+
+def _preparar_entorno(args):
+    if not args.emulador:
+        os.environ["CERM_FIRESTORE"] = "memoria"
+    elif not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        sys.exit("--emulador requiere FIRESTORE_EMULATOR_HOST (ej: localhost:8080)")
+    os.environ["CERM_ALMACEN"] = "firestore"
+    # La cola de guardar_alumno va a un archivo temporal, nunca a la cola real
+    os.environ["CERM_COLA_DB"] = os.path.join(tempfile.mkdtemp(prefix="cerm_bench_"), "cola.db")
+
+# ==========================================
+# 1. PREPARACIÓN DE DATOS
+# ==========================================
+def _vaciar_coleccion(db, nombre):
+    import utils
+    while True:
+        docs = list(db.collection(nombre).limit(utils.TAMANO_LOTE).stream())
+        if not docs: return
+        batch = db.batch()
+        for doc in docs:
+            batch.delete(doc.reference)
+        batch.commit()
+
+def _reiniciar(utils, emulador):
+    """Base vacía y caches de proceso limpios antes de cada tamaño."""
+    alm = utils.obtener_almacen()
+    if alm.escucha is not None: alm.escucha.unsubscribe()
+    if emulador:
+        for nombre in ("participantes", "directorio_alumnos", "configuracion", "historial_cambios"):
+            _vaciar_coleccion(utils.db, nombre)
+    else:
+        utils._cliente_firestore.clear()  # el próximo uso crea un ClienteMemoria vacío
+    utils.almacen_datos.clear()
+    utils.obtener_almacen.clear()
+    utils.invalidar_configuracion()
+    utils._cache_claves["escuchando"] = False
+
+def _df_resultados(utils, participantes):
+    """Mismo DataFrame que arma pages/Resultados.py para los reportes."""
+    import pandas as pd
+    mapa = utils.cargar_mapa_directorio()
+    filas = []
+    for p in participantes:
+        metricas = p.get("metricas", {})
+        dni = utils.normalizar_dni(p.get("dni", ""))
+        filas.append({
+            "DNI": dni, "Estudiante": p.get("nombre"), "Colegio": p.get("colegio"),
+            "Grado": p.get("grado"), "Categoría": p.get("categoria"),
+            "UGEL": p.get("ugel", ""), "Gestión": p.get("gestion", ""),
+            "Puntaje": metricas.get("total_puntos", 0), "Correctas": metricas.get("correctas", 0),
+            "Incorrectas": metricas.get("incorrectas", 0), "En Blanco": metricas.get("en_blanco", 0),
+            "Hora": p.get("info_registro", {}).get("hora_entrega", "23:59:59"),
+            "Docente": mapa[dni]["docente"] if dni in mapa else "No registrado",
+        })
+    return pd.DataFrame(filas)
+
+# ==========================================
+# 2. ETAPAS
+# ==========================================
+# Cada etapa es (nombre, preparar, medir, unidades): preparar() deja el estado
+# (frío o tibio) y no se cronometra; medir(estado) es lo que se mide; unidades
+# es cuántos elementos procesa una ejecución (para el rendimiento).
+def _etapas(utils, datos):
+    from datos_sinteticos import generar_hojas
+    directorio, hojas, claves = datos["directorio"], datos["hojas"], datos["claves"]
+    n_dir, n_part = len(directorio), len(hojas)
+    n_cat1 = sum(1 for d in hojas if directorio[d]["categoria"] == "CAT 1")
+    alm = lambda: utils.obtener_almacen()
+
+    def directorio_frio():
+        alm().directorio = None
+        alm().derivados_directorio.clear()
+
+    def derivados_frios():
+        utils.cargar_directorio_csv()  # padrón ya en memoria
+        alm().derivados_directorio.clear()
+
+    def resultados_frios():
+        with alm().lock:
+            alm().cursor = None
+            alm().reemplazar_participantes({})
+
+    def resultados_cargados():
+        utils.load_data()
+
+    def con_indice():
+        utils.buscar_estudiantes("a")
+        nombres = [d["apellidos"].split()[0] for d in list(directorio.values())[:50]]
+        dnis = [dni[:4] for dni in list(directorio)[:50]]
+        return nombres + dnis
+
+    def matriz_lote():
+        lista = [hojas[d][0] for d in hojas if directorio[d]["categoria"] == "CAT 1"]
+        return utils.construir_matriz_respuestas(lista), claves["CAT 1"]
+
+    def df_reporte():
+        utils.load_data()
+        return _df_resultados(utils, utils.load_data()["participants"])
+
+    def registros_nuevos():
+        nuevos = generar_hojas(directorio, claves, asistencia=1.0, semilla=99)
+        muestra = list(nuevos.items())[:200]
+        return [{
+            "alumno": {"dni": dni, "nombres": directorio[dni]["nombre_completo"],
+                       "colegio": directorio[dni]["institucion"], "grado": directorio[dni]["grado"],
+                       "categoria": directorio[dni]["categoria"], "ugel": directorio[dni]["ugel"],
+                       "gestion": directorio[dni]["gestion"], "docente": directorio[dni]["docente"]},
+            "examen": {"respuestas": respuestas},
+            "metricas": utils.calcular_nota(respuestas, claves[directorio[dni]["categoria"]])[-1],
+            "info_registro": {"hora_entrega": hora},
+        } for dni, (respuestas, hora) in muestra]
+
+    def guardar_todos(registros):
+        for datos_alumno in registros:
+            if not utils.guardar_alumno(datos_alumno):
+                raise RuntimeError("guardar_alumno devolvió False")
+
+    return [
+        ("cargar_directorio_csv (frío)", directorio_frio, lambda _: utils.cargar_directorio_csv(), n_dir),
+        ("cargar_directorio_csv (tibio)", derivados_frios, lambda _: utils.cargar_directorio_csv(), n_dir),
+        ("cargar_mapa_directorio", derivados_frios, lambda _: utils.cargar_mapa_directorio(), n_dir),
+        ("buscar_estudiantes (índice)", derivados_frios, lambda _: utils.buscar_estudiantes("quispe"), n_dir),
+        ("buscar_estudiantes (100 consultas)", con_indice,
+         lambda consultas: [utils.buscar_estudiantes(c) for c in consultas], 100),
+        ("load_data (frío)", resultados_frios, lambda _: utils.load_data(), n_part),
+        ("load_data (tibio)", resultados_cargados, lambda _: utils.load_data(), n_part),
+        ("indice ranking (reconstruir)", resultados_cargados,
+         lambda _: utils.IndiceRanking().reconstruir(alm().participantes), n_part),
+        ("ranking top 20 por categoría", resultados_cargados,
+         lambda _: [utils.ranking(categoria=c, cantidad=20) for c in claves], 3),
+        ("calcular_notas_lote (CAT 1)", matriz_lote,
+         lambda m: utils.calcular_notas_lote(*m), n_cat1),
+        ("generar_reporte_pdf_bytes", df_reporte, lambda df: utils.generar_reporte_pdf_bytes(df), n_part),
+        ("guardar_alumno (200 a la cola)", registros_nuevos, guardar_todos, 200),
+    ]
+
+# ==========================================
+# 3. MEDICIÓN
+# ==========================================
+def _cronometrar(preparar, medir, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        estado = preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        medir(estado)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+def _memoria_pico(preparar, medir):
+    """Bytes pico asignados durante una ejecución (corrida aparte: tracemalloc es lento)."""
+    estado = preparar()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        medir(estado)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def medir_tamano(utils, cantidad, repeticiones, con_memoria, emulador):
+    import datos_sinteticos
+    _reiniciar(utils, emulador)
+    inicio = time.perf_counter()
+    directorio, hojas, claves = datos_sinteticos.poblar(utils.db, cantidad)
+    siembra = time.perf_counter() - inicio
+    datos = {"directorio": directorio, "hojas": hojas, "claves": claves}
+
+    resultados = [{"etapa": "poblar (padrón + participantes)", "n": cantidad,
+                   "mejor_s": siembra, "mediana_s": siembra, "por_seg": cantidad / siembra, "pico_mb": None}]
+    for nombre, preparar, medir, unidades in _etapas(utils, datos):
+        tiempos = _cronometrar(preparar, medir, repeticiones)
+        mediana = statistics.median(tiempos)
+        pico = _memoria_pico(preparar, medir) / 2**20 if con_memoria else None
+        resultados.append({"etapa": nombre, "n": cantidad, "mejor_s": min(tiempos), "mediana_s": mediana,
+                           "por_seg": unidades / mediana if mediana else None, "pico_mb": pico})
+        print(f"  {nombre:<38} {1000 * mediana:>10.2f} ms", file=sys.stderr)
+    return resultados
+
+# ==========================================
+# 4. REPORTE Y COMPARACIÓN
+# ==========================================
+def imprimir(resultados):
+    print(f"\n{'n':>7}  {'etapa':<38} {'mejor ms':>10} {'mediana ms':>11} {'elem/s':>12} {'pico MB':>9}")
+    for r in resultados:
+        por_seg = f"{r['por_seg']:>12,.0f}" if r["por_seg"] else f"{'—':>12}"
+        pico = f"{r['pico_mb']:>9.1f}" if r["pico_mb"] is not None else f"{'—':>9}"
+        print(f"{r['n']:>7}  {r['etapa']:<38} {1000 * r['mejor_s']:>10.2f} {1000 * r['mediana_s']:>11.2f} {por_seg} {pico}")
+
+def comparar(resultados, ruta_base, tolerancia):
+    """Lista de (etapa, n, mediana_base, mediana_actual) que empeoraron más que la tolerancia."""
+    with open(ruta_base, encoding="utf-8") as f:
+        base = {(r["etapa"], r["n"]): r for r in json.load(f)["resultados"]}
+    regresiones = []
+    for r in resultados:
+        previo = base.get((r["etapa"], r["n"]))
+        if previo and r["mediana_s"] > previo["mediana_s"] * (1 + tolerancia):
+            regresiones.append((r["etapa"], r["n"], previo["mediana_s"], r["mediana_s"]))
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del camino de datos (utils) con datos sintéticos.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS), help="Cantidades de alumnos a probar")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones cronometradas por etapa")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir la memoria pico (más rápido)")
+    parser.add_argument("--emulador", action="store_true", help="Usar el emulador (FIRESTORE_EMULATOR_HOST) en vez de memoria")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="Empeoramiento permitido (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    _preparar_entorno(args)
+    import utils
+    # Las importaciones diferidas (pandas, fpdf, SDK) se pagan aquí y no en la
+    # primera etapa: el arranque en frío lo reporta utils.TIEMPOS_ARRANQUE
+    import pandas, reportes, firebase_admin.firestore
+
+    resultados = []
+    for cantidad in args.tamanos:
+        print(f"Midiendo {cantidad:,} alumnos…", file=sys.stderr)
+        resultados += medir_tamano(utils, cantidad, args.repeticiones, not args.sin_memoria, args.emulador)
+    imprimir(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"fecha": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                       "backend": "emulador" if args.emulador else "memoria", "resultados": resultados},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.json}")
+
+    if args.comparar:
+        regresiones = comparar(resultados, args.comparar, args.tolerancia)
+        if regresiones:
+            print(f"\n⚠️ {len(regresiones)} etapa(s) más lentas que la referencia (+{args.tolerancia:.0%}):")
+            for etapa, n, antes, ahora in regresiones:
+                print(f"  {n:>7}  {etapa:<38} {1000 * antes:.2f} ms -> {1000 * ahora:.2f} ms")
+            sys.exit(1)
+        print("\n✅ Sin regresiones respecto a la referencia.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import sqlite3
+import json
+import threading
+import time
+from datetime import datetime
+
+# ==========================================
+# COLA DE ESCRITURA DIFERIDA (WRITE-BEHIND)
+# ==========================================
+# Los exámenes registrados se guardan primero en un SQLite local (durable: no
+# se pierden si se cae la red o se reinicia el servidor) y un hilo de fondo los
+# sube a Firestore por lotes, reintentando con espera exponencial.
+MAX_LOTE = 450
+ESPERA_MAX_SEG = 60
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {"__fecha__": valor.isoformat()}
+    # Enteros de numpy (métricas) y cualquier otro escalar raro
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+def _desde_json(objeto):
+    return datetime.fromisoformat(objeto["__fecha__"]) if "__fecha__" in objeto else objeto
+
+def serializar(documento):
+    return json.dumps(documento, default=_a_json)
+
+def deserializar(texto):
+    return json.loads(texto, object_hook=_desde_json)
+
+class ColaRegistros:
+    """
+    Cola durable de documentos pendientes de subir; registro None = borrar.
+    Casi todo es de 'participantes' (doc_id = DNI), pero también lleva la
+    configuración y el historial cuando el almacén principal es local.
+    """
+    def __init__(self, ruta, enviar_lote):
+        self.ruta = ruta
+        self.enviar_lote = enviar_lote  # enviar_lote([(coleccion, doc_id, registro), ...]); lanza excepción si falla
+        self.lock = threading.Lock()
+        # Serializa leer -> enviar -> borrar: el hilo de fondo y vaciar_cola()
+        # no pueden subir lotes a la vez (duplicados o versiones viejas al final)
+        self.lock_envio = threading.Lock()
+        self.hay_trabajo = threading.Event()
+        self.hilo = None
+        self.enviados = 0
+        self.ultimo_envio = None   # time.time() del último lote confirmado
+        self.ultimo_error = None   # texto del último fallo (None si el último intento salió bien)
+        self._ejecutar("""CREATE TABLE IF NOT EXISTS pendientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dni TEXT NOT NULL,
+            registro TEXT NOT NULL,
+            creado REAL NOT NULL)""")
+        columnas = [fila[1] for fila in self._ejecutar("PRAGMA table_info(pendientes)")]
+        if "coleccion" not in columnas:
+            self._ejecutar("ALTER TABLE pendientes ADD COLUMN coleccion TEXT NOT NULL DEFAULT 'participantes'")
+        self._ejecutar("CREATE INDEX IF NOT EXISTS idx_pendientes_dni ON pendientes (coleccion, dni)")
+
+    def _ejecutar(self, sql, parametros=(), varios=False):
+        with self.lock:
+            con = sqlite3.connect(self.ruta, timeout=30)
+            try:
+                with con:
+                    cursor = con.executemany(sql, parametros) if varios else con.execute(sql, parametros)
+                    return cursor.fetchall()
+            finally:
+                con.close()
+
+    # --- Operaciones de la cola ---
+    def poner(self, dni, registro, coleccion='participantes'):
+        self._ejecutar("INSERT INTO pendientes (coleccion, dni, registro, creado) VALUES (?, ?, ?, ?)",
+                       (coleccion, dni, serializar(registro), time.time()))
+        self.hay_trabajo.set()
+
+    def buscar_pendiente(self, dni, coleccion='participantes'):
+        """(hay_pendiente, registro): registro None = borrado pendiente."""
+        filas = self._ejecutar("SELECT registro FROM pendientes WHERE coleccion = ? AND dni = ? ORDER BY id DESC LIMIT 1",
+                               (coleccion, dni))
+        return (True, deserializar(filas[0][0])) if filas else (False, None)
+
+    def pendientes(self, coleccion='participantes'):
+        """dni -> último registro pendiente (None = borrado pendiente)."""
+        filas = self._ejecutar("SELECT dni, registro FROM pendientes WHERE coleccion = ? ORDER BY id", (coleccion,))
+        return {dni: deserializar(registro) for dni, registro in filas}
+
+    def profundidad(self):
+        return self._ejecutar("SELECT COUNT(*) FROM pendientes")[0][0]
+
+    def estado(self):
+        return {
+            "pendientes": self.profundidad(),
+            "enviados": self.enviados,
+            "ultimo_envio": self.ultimo_envio,
+            "ultimo_error": self.ultimo_error,
+            "activa": self.hilo is not None and self.hilo.is_alive(),
+        }
+
+    # --- Envío en segundo plano ---
+    def vaciar_una_vez(self):
+        """Sube un lote. Devuelve cuántas filas salieron de la cola (0 si estaba vacía)."""
+        with self.lock_envio:
+            filas = self._ejecutar("SELECT id, coleccion, dni, registro FROM pendientes ORDER BY id LIMIT ?", (MAX_LOTE,))
+            if not filas: return 0
+            # Si un documento se guardó varias veces, basta con la última versión
+            ultimos = {}
+            for _, coleccion, dni, registro in filas:
+                ultimos[(coleccion, dni)] = deserializar(registro)
+            self.enviar_lote([(coleccion, dni, registro) for (coleccion, dni), registro in ultimos.items()])
+            self._ejecutar("DELETE FROM pendientes WHERE id = ?", [(fila[0],) for fila in filas], varios=True)
+            self.enviados += len(ultimos)
+            self.ultimo_envio = time.time()
+            self.ultimo_error = None
+            return len(filas)
+
+    def _bucle(self):
+        espera = 1
+        while True:
+            try:
+                self.hay_trabajo.clear()
+                if self.vaciar_una_vez():
+                    espera = 1
+                    continue
+                self.hay_trabajo.wait(ESPERA_MAX_SEG)
+            except Exception as e:
+                self.ultimo_error = str(e)
+                print(f"Aviso: no se pudo subir la cola de registros (reintento en {espera}s): {e}")
+                time.sleep(espera)
+                espera = min(espera * 2, ESPERA_MAX_SEG)
+
+    def iniciar(self):
+        if self.hilo is None or not self.hilo.is_alive():
+            self.hilo = threading.Thread(target=self._bucle, name="cola-registros", daemon=True)
+            self.hilo.start()
+        return self
@@ -0,0 +1,209 @@
+import streamlit as st
+from datetime import datetime
+import utils
+
+# ==========================================
+# BUSCADOR DE ESTUDIANTES (COMPARTIDO)
+# ==========================================
+# Es un fragmento: escribir en la caja solo vuelve a ejecutar el buscador. La
+# página completa se recarga una sola vez, cuando cambia el alumno elegido.
+@st.fragment
+def _buscador(key, etiqueta, limite):
+    texto = st.text_input(
+        "Escriba DNI, apellidos, nombres o institución:",
+        key=f"{key}_texto",
+        placeholder="Ej: 71611170 o Huayta Torres"
+    )
+    opciones = [""]
+    if texto:
+        coincidencias = utils.buscar_estudiantes(texto, limite)
+        opciones += [f"{dni} | {nombre}" for dni, nombre, _ in coincidencias]
+        if not coincidencias:
+            st.caption("Sin coincidencias en el padrón.")
+    elegido = st.selectbox(etiqueta, opciones, key=key)
+    if elegido != st.session_state.get(f"{key}_aplicado", ""):
+        st.session_state[f"{key}_aplicado"] = elegido
+        st.rerun()  # el resto de la página se rellena con el alumno elegido
+
+def buscador_estudiantes(key, etiqueta="Seleccione un estudiante:", limite=20):
+    """
+    Caja de texto + lista corta de coincidencias (índice del padrón).
+    Devuelve 'DNI | Nombre' del alumno elegido o '' si no hay selección.
+    """
+    _buscador(key, etiqueta, limite)
+    return st.session_state.get(f"{key}_aplicado", "")
+
+def limpiar_buscador(key):
+    st.session_state[f"{key}_texto"] = ""
+    st.session_state[key] = ""
+    st.session_state[f"{key}_aplicado"] = ""
+
+# ==========================================
+# HOJA DE RESPUESTAS (COMPARTIDA)
+# ==========================================
+OPCIONES_RESPUESTA = utils.OPCIONES_RESPUESTA  # la misma lista con la que califica y valida utils
+
+def horas_entrega():
+    """utils.HORARIO_ENTREGA (10:30 a 16:00), minuto a minuto."""
+    return [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)
+            if utils.en_horario_entrega(f"{h:02d}:{m:02d}")]
+
+def vista_previa_puntaje(respuestas, categoria):
+    """Puntaje calculado al instante con la clave en memoria (no guarda nada)."""
+    patron = utils.obtener_patron_respuestas(categoria)
+    if not patron or not any(patron):
+        st.caption(f"⚠️ Sin clave configurada para {categoria}: no se puede calcular el puntaje.")
+        return None
+    total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric(f"Puntaje ({categoria})", total)
+    m2.metric("Correctas", ok)
+    m3.metric("Incorrectas", bad)
+    m4.metric("En blanco", blank)
+    return metricas
+
+@st.fragment
+def hoja_respuestas(key, categoria, al_guardar, respuestas_iniciales=None, hora_inicial=None,
+                    con_hora=True, por_fila=10, etiqueta="P{}", texto_boton="💾 Guardar Participante"):
+    """
+    Cuadrícula de 20 respuestas, hora de entrega, puntaje en vivo y botón de
+    guardar. Es un fragmento: cambiar una respuesta solo vuelve a ejecutar esta
+    sección, no la carga del padrón ni el resto de la página.
+    al_guardar(respuestas, hora) se define en la página con los datos del alumno
+    (hora es None si con_hora=False).
+    """
+    iniciales = respuestas_iniciales or [""] * utils.NUM_PREGUNTAS
+    hora = None
+    if con_hora:
+        c_hora, c_resp = st.columns([1, 4])
+        with c_hora:
+            horas = horas_entrega()
+            idx_hora = horas.index(hora_inicial) if hora_inicial in horas else 0
+            st.markdown("<br>", unsafe_allow_html=True)
+            hora = st.selectbox("⏰ Hora de Entrega", horas, index=idx_hora, key=f"{key}_hora")
+    else:
+        c_resp = st.container()
+
+    with c_resp:
+        respuestas = []
+        for inicio in range(0, utils.NUM_PREGUNTAS, por_fila):
+            columnas = st.columns(por_fila)
+            for j, col in enumerate(columnas):
+                i = inicio + j + 1
+                with col:
+                    st.markdown(f'<div class="question-box"><span class="question-label">{etiqueta.format(i)}</span></div>', unsafe_allow_html=True)
+                    previa = iniciales[i - 1]
+                    idx = OPCIONES_RESPUESTA.index(previa) if previa in OPCIONES_RESPUESTA else 0
+                    respuestas.append(st.selectbox(f"P{i}", OPCIONES_RESPUESTA, index=idx,
+                                                   key=f"{key}_p{i}", label_visibility="collapsed"))
+            st.write("")
+
+    vista_previa_puntaje(respuestas, categoria)
+
+    st.markdown("---")
+    if st.button(texto_boton, type="primary", use_container_width=True, key=f"{key}_guardar"):
+        al_guardar(respuestas, hora)
+
+def hora_actual_en_rango():
+    """Hora actual (HH:MM) si cae dentro del horario de entrega; si no, None."""
+    ahora = datetime.now().strftime("%H:%M")
+    return ahora if ahora in horas_entrega() else None
+
+# ==========================================
+# REGISTRO RÁPIDO (SOLO TECLADO)
+# ==========================================
+# Dos campos: DNI y las 20 respuestas de corrido. Enter guarda, muestra el
+# puntaje y deja los campos vacíos para la siguiente hoja. Los datos del
+# alumno salen del padrón, así que el DNI debe estar registrado.
+HORA_ACTUAL = "Hora actual"
+
+def _datos_padron(alumno):
+    """Alumno del padrón -> datos['alumno'] con los mismos valores que el formulario completo."""
+    grado = alumno["grado"] if alumno["grado"] in ["1ro", "2do", "3ro", "4to", "5to"] else "1ro"
+    categoria = alumno["categoria"]
+    if categoria not in ["CAT 1", "CAT 2", "CAT 3"]:
+        categoria = "CAT 1" if grado == "5to" else "CAT 2" if grado in ["3ro", "4to"] else "CAT 3"
+    return {
+        "dni": alumno["dni"], "nombres": alumno["nombre_completo"], "colegio": alumno["institucion"],
+        "grado": grado, "categoria": categoria, "ugel": alumno["ugel"],
+        "gestion": "Gestión privada" if "privada" in alumno["gestion"].lower() else "Gestión pública",
+        "docente": alumno["docente"],
+    }
+
+def _guardar_rapido(key):
+    # Callback del formulario: corre antes del rerun, así puede vaciar los campos
+    estado = st.session_state
+    dni = utils.normalizar_dni(estado.get(f"{key}_dni", ""))
+    texto = estado.get(f"{key}_respuestas", "")
+    alumno = utils.cargar_mapa_directorio().get(dni)
+    if alumno is None:
+        estado[f"{key}_aviso"] = ("error", f"El DNI {dni or '(vacío)'} no está en el padrón: regístrelo en el modo completo.")
+        return
+    datos_alumno = _datos_padron(alumno)
+    if not texto:
+        # Flujo DNI primero: Enter en el DNI confirma el alumno antes de teclear respuestas
+        estado[f"{key}_aviso"] = ("info", f"👤 {datos_alumno['nombres']} · {datos_alumno['grado']} · {datos_alumno['categoria']} — escriba las 20 respuestas.")
+        return
+    respuestas, error = utils.validar_respuestas_tecleadas(texto)
+    if error:
+        estado[f"{key}_aviso"] = ("error", f"⚠️ {error}")
+        return
+    patron = utils.obtener_patron_respuestas(datos_alumno["categoria"])
+    if not patron or not any(patron):
+        estado[f"{key}_aviso"] = ("error", f"⚠️ Configure la clave de {datos_alumno['categoria']} primero en 'Configuración'.")
+        return
+
+    total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
+    hora = estado.get(f"{key}_hora", HORA_ACTUAL)
+    if hora == HORA_ACTUAL:
+        hora = hora_actual_en_rango()
+        if hora is None:
+            estado[f"{key}_aviso"] = ("error", f"⚠️ La hora actual está fuera del horario de entrega ({utils.HORARIO_ENTREGA[0]} a {utils.HORARIO_ENTREGA[1]}): elija la hora en la lista.")
+            return
+    # Sin lecturas a la nube: el guardado va a la cola aunque no haya red; si
+    # la consulta falla solo se omite el aviso de reemplazo
+    try:
+        reemplaza = utils.participante_conocido(dni)
+    except Exception:
+        reemplaza = False
+    datos = {
+        "alumno": datos_alumno,
+        "examen": {"respuestas": respuestas},
+        "metricas": {"total_puntos": total, "correctas": ok, "incorrectas": bad, "en_blanco": blank},
+        "info_registro": {"hora_entrega": hora}
+    }
+    if not utils.guardar_alumno(datos):
+        estado[f"{key}_aviso"] = ("error", "❌ Error al guardar en la base de datos.")
+        return
+
+    estado[f"{key}_dni"] = ""
+    estado[f"{key}_respuestas"] = ""
+    nota = " · reemplazó el examen anterior" if reemplaza else ""
+    estado[f"{key}_aviso"] = ("success", f"✅ {dni} · {datos_alumno['nombres']} · {datos_alumno['categoria']}: **{total} pts** ({ok} correctas, {bad} incorrectas, {blank} en blanco){nota}")
+    estado[f"{key}_ultimos"] = [{
+        "Hora": hora, "DNI": dni, "Estudiante": datos_alumno["nombres"], "Categoría": datos_alumno["categoria"],
+        "Respuestas": utils.compactar_respuestas(respuestas), "Puntaje": total,
+    }] + estado.get(f"{key}_ultimos", [])[:9]
+
+@st.fragment
+def registro_rapido(key="rapido"):
+    """Formulario de dos campos para digitar hojas seguidas sin usar el mouse."""
+    st.selectbox("⏰ Hora de entrega (se mantiene para las siguientes hojas)",
+                 [HORA_ACTUAL] + horas_entrega(), key=f"{key}_hora")
+    with st.form(f"{key}_form"):
+        c_dni, c_resp = st.columns([1, 3])
+        c_dni.text_input("🆔 DNI", key=f"{key}_dni", max_chars=12, placeholder="71611170")
+        c_resp.text_input("📝 Respuestas (20 letras; _ o espacio = blanco)", key=f"{key}_respuestas",
+                          max_chars=utils.NUM_PREGUNTAS, placeholder="ABCDE_ABCDE_ABCDE_AB")
+        st.form_submit_button("💾 Guardar y siguiente (Enter)", type="primary", use_container_width=True,
+                              on_click=_guardar_rapido, args=(key,))
+    st.caption("DNI → Tab → respuestas → Enter. Enter en el DNI solo muestra el alumno.")
+
+    aviso = st.session_state.get(f"{key}_aviso")
+    if aviso:
+        tipo, texto = aviso
+        getattr(st, tipo)(texto)
+    ultimos = st.session_state.get(f"{key}_ultimos")
+    if ultimos:
+        st.markdown("##### Últimas hojas guardadas")
+        st.dataframe(ultimos, hide_index=True, use_container_width=True)
@@ -0,0 +1,94 @@
+import streamlit as st
+import asyncio
+import threading
+import os
+import utils
+
+# ==========================================
+# ACCESO ASÍNCRONO A FIRESTORE
+# ==========================================
+# Un event loop propio (hilo daemon, uno por proceso) con su AsyncClient: las
+# lecturas de directorio, resultados y clave salen juntas con asyncio.gather y
+# la página espera solo a la más lenta. precargar() es la fachada síncrona
+# para las páginas: deja todo en el almacén de utils y las funciones de
+# siempre (cargar_mapa_directorio, load_data, cargar_configuracion) responden
+# desde memoria. El SDK se importa recién en _cliente(): en modo SQLite o sin
+# red la página de resultados no lo carga.
+_estado = {"db": None}
+
+@st.cache_resource
+def _bucle():
+    bucle = asyncio.new_event_loop()
+    threading.Thread(target=bucle.run_forever, name="firestore-async", daemon=True).start()
+    return bucle
+
+def _cliente():
+    # Se crea dentro del loop: el canal gRPC queda ligado a él
+    if _estado["db"] is None:
+        if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            from google.cloud import firestore as gcloud_firestore
+            _estado["db"] = gcloud_firestore.AsyncClient(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "cerm-2025"))
+        else:
+            from firebase_admin import firestore_async
+            utils.obtener_db()  # inicializa la app de Firebase si aún no se hizo
+            _estado["db"] = firestore_async.client()
+    return _estado["db"]
+
+def ejecutar(corrutina, timeout=None):
+    """Corre una corrutina en el loop de fondo y espera su resultado."""
+    return asyncio.run_coroutine_threadsafe(corrutina, _bucle()).result(timeout)
+
+# ==========================================
+# 1. LECTURAS
+# ==========================================
+async def leer_configuracion():
+    doc = await _cliente().collection('configuracion').document('respuestas_oficiales').get()
+    return doc.to_dict() if doc.exists else dict(utils.CLAVES_POR_DEFECTO)
+
+async def leer_directorio():
+    return {doc.id: doc.to_dict() async for doc in _cliente().collection('directorio_alumnos').stream()}
+
+async def leer_resultados(desde=None):
+    """Campos del ranking de 'participantes'; con 'desde' solo lo modificado después."""
+    consulta = _cliente().collection('participantes')
+    if desde is not None:
+        consulta = consulta.where('actualizado_en', '>', desde)
+    consulta = consulta.select(utils.CAMPOS_RANKING)
+    return {doc.id: doc.to_dict() async for doc in consulta.stream()}
+
+async def _nada():
+    return None
+
+async def leer_todo(directorio=True, resultados=True, configuracion=True, desde=None):
+    """(directorio, resultados, configuracion) leídos en paralelo; None en lo no pedido."""
+    return await asyncio.gather(
+        leer_directorio() if directorio else _nada(),
+        leer_resultados(desde) if resultados else _nada(),
+        leer_configuracion() if configuracion else _nada(),
+    )
+
+# ==========================================
+# 2. FACHADA SÍNCRONA
+# ==========================================
+def precargar(directorio=True, resultados=True, configuracion=True, timeout=60):
+    """
+    Lee en paralelo solo lo que aún no está en memoria. Si falla, no pasa
+    nada: las funciones de utils leerán por su cuenta como siempre.
+    """
+    if os.environ.get("CERM_FIRESTORE") == "memoria":
+        return False  # sin cliente asíncrono: los datos ya están en el proceso
+    plan = utils.planificar_precarga()
+    directorio = directorio and plan["directorio"]
+    configuracion = configuracion and plan["configuracion"]
+    # Las deltas son baratas y load_data ya las hace; aquí solo la lectura completa
+    resultados = resultados and plan["resultados"] is not None and plan["resultados"][0]
+    if not (directorio or resultados or configuracion):
+        return False
+    try:
+        dir_leido, res_leidos, cfg_leida = ejecutar(
+            leer_todo(directorio, resultados, configuracion), timeout)
+    except Exception as e:
+        print(f"Aviso: falló la precarga asíncrona: {e}")
+        return False
+    utils.aplicar_precarga(dir_leido, res_leidos, True, cfg_leida)
+    return True
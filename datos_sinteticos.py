@@ -0,0 +1,118 @@
+import numpy as np
+
+# ==========================================
+# DATOS SINTÉTICOS (PADRÓN + HOJAS DE RESPUESTAS)
+# ==========================================
+# Genera un concurso completo con la forma de data.json y de las colecciones
+# reales: padrón por colegio y grado, claves por categoría y hojas con
+# puntajes y horas de entrega realistas. Todo es reproducible con 'semilla'.
+GRADOS = ["1ro", "2do", "3ro", "4to", "5to"]
+CATEGORIA_POR_GRADO = {"1ro": "CAT 3", "2do": "CAT 3", "3ro": "CAT 2", "4to": "CAT 2", "5to": "CAT 1"}
+OPCIONES = np.array(list("ABCDE"))
+
+NOMBRES = ["SERGIO", "LUCIA", "CARLOS", "MARIA", "JOSE", "ANA", "LUIS", "ROSA", "JORGE", "CARMEN",
+           "MIGUEL", "SOFIA", "DIEGO", "VALERIA", "ANGEL", "CAMILA", "JUAN", "XIMENA", "PEDRO", "NAYELI"]
+APELLIDOS = ["HUAYTA", "TORRES", "QUISPE", "MAMANI", "FLORES", "RAMOS", "CONDORI", "GARCIA", "ROJAS",
+             "CHAVEZ", "VARGAS", "MENDOZA", "HUAMAN", "SALAZAR", "PAREDES", "CASTRO", "RIVERA", "LOPEZ"]
+UGELS = ["UGEL HUANCAYO", "UGEL CHUPACA", "UGEL CONCEPCIÓN", "UGEL JAUJA", "UGEL TARMA", "UGEL SATIPO"]
+GESTIONES = ["Pública", "Privada"]
+
+def generar_claves(semilla=0):
+    """Clave oficial (20 letras) por categoría."""
+    azar = np.random.default_rng(semilla)
+    return {cat: list(OPCIONES[azar.integers(0, 5, 20)]) for cat in ("CAT 1", "CAT 2", "CAT 3")}
+
+def generar_directorio(cantidad, semilla=0, alumnos_por_colegio=40):
+    """dni -> alumno con los campos de 'directorio_alumnos'."""
+    azar = np.random.default_rng(semilla)
+    dnis = 60000000 + azar.choice(30000000, size=cantidad, replace=False)
+    colegios = max(1, cantidad // alumnos_por_colegio)
+    directorio = {}
+    for n, dni in enumerate(dnis):
+        colegio = int(azar.integers(colegios))
+        grado = GRADOS[int(azar.integers(5))]
+        nombres = NOMBRES[int(azar.integers(len(NOMBRES)))]
+        apellidos = f"{APELLIDOS[int(azar.integers(len(APELLIDOS)))]} {APELLIDOS[int(azar.integers(len(APELLIDOS)))]}"
+        directorio[str(dni)] = {
+            "dni": str(dni),
+            "nombres": nombres,
+            "apellidos": apellidos,
+            "nombre_completo": f"{apellidos} {nombres}",
+            "grado": grado,
+            "categoria": CATEGORIA_POR_GRADO[grado],
+            "institucion": f"I.E. N° {30000 + colegio}",
+            "ugel": UGELS[colegio % len(UGELS)],
+            "gestion": GESTIONES[colegio % 3 == 0],
+            "docente": f"{NOMBRES[colegio % len(NOMBRES)]} {APELLIDOS[colegio % len(APELLIDOS)]}",
+        }
+    return directorio
+
+def generar_hojas(directorio, claves, asistencia=0.9, semilla=0):
+    """
+    Hojas de respuestas de los alumnos que asistieron: dni -> (respuestas, hora).
+    Cada alumno tiene una habilidad Beta(2, 3); responde en blanco más cuando
+    es débil y entrega entre 10:30 y 16:00 (más temprano si le fue mejor).
+    """
+    azar = np.random.default_rng(semilla + 1)
+    dnis = [d for d in directorio if azar.random() < asistencia]
+    n = len(dnis)
+    habilidad = azar.beta(2, 3, n)[:, None]
+    prob_blanco = 0.35 * (1 - habilidad)
+    sorteo = azar.random((n, 20))
+    en_blanco = sorteo < prob_blanco
+    correcta = ~en_blanco & (azar.random((n, 20)) < habilidad)
+    errada = OPCIONES[azar.integers(0, 5, (n, 20))]
+
+    minutos = np.clip(azar.normal(13 * 60 + 15, 60, n) - 45 * habilidad[:, 0], 10 * 60 + 30, 16 * 60).astype(int)
+    segundos = azar.integers(0, 60, n)
+    hojas = {}
+    for i, dni in enumerate(dnis):
+        clave = np.array(claves[directorio[dni]["categoria"]])
+        fila = np.where(correcta[i], clave, errada[i])
+        fila = np.where(en_blanco[i], "", fila)
+        hora = f"{minutos[i] // 60:02d}:{minutos[i] % 60:02d}:{segundos[i]:02d}"
+        hojas[dni] = (fila.tolist(), hora)
+    return hojas
+
+def poblar(db, cantidad, semilla=0):
+    """
+    Llena un cliente de Firestore (normalmente firestore_memoria) con clave,
+    padrón y participantes calificados. Devuelve (directorio, hojas, claves).
+    """
+    import utils
+    claves = generar_claves(semilla)
+    directorio = generar_directorio(cantidad, semilla)
+    hojas = generar_hojas(directorio, claves, semilla=semilla)
+
+    db.collection('configuracion').document('respuestas_oficiales').set({**claves, "version": 1})
+    lote_dir = list(directorio.items())
+    for inicio in range(0, len(lote_dir), utils.TAMANO_LOTE):
+        batch = db.batch()
+        for dni, alumno in lote_dir[inicio:inicio + utils.TAMANO_LOTE]:
+            batch.set(db.collection('directorio_alumnos').document(dni), alumno)
+        batch.commit()
+
+    # Calificación en bloque por categoría, igual que en la importación masiva
+    registros = []
+    for cat in claves:
+        dnis = [d for d in hojas if directorio[d]["categoria"] == cat]
+        if not dnis: continue
+        matriz = utils.construir_matriz_respuestas([hojas[d][0] for d in dnis])
+        puntajes, correctas, incorrectas, en_blanco = utils.calcular_notas_lote(matriz, claves[cat])
+        for i, dni in enumerate(dnis):
+            alumno = directorio[dni]
+            registros.append(utils.construir_registro({
+                "alumno": {"dni": dni, "nombres": alumno["nombre_completo"], "colegio": alumno["institucion"],
+                           "grado": alumno["grado"], "categoria": cat, "ugel": alumno["ugel"],
+                           "gestion": alumno["gestion"], "docente": alumno["docente"]},
+                "examen": {"respuestas": hojas[dni][0]},
+                "metricas": {"total_puntos": int(puntajes[i]), "correctas": int(correctas[i]),
+                             "incorrectas": int(incorrectas[i]), "en_blanco": int(en_blanco[i])},
+                "info_registro": {"hora_entrega": hojas[dni][1]},
+            }))
+    for inicio in range(0, len(registros), utils.TAMANO_LOTE):
+        batch = db.batch()
+        for registro in registros[inicio:inicio + utils.TAMANO_LOTE]:
+            batch.set(db.collection('participantes').document(registro["dni"]), registro)
+        batch.commit()
+    return directorio, hojas, claves
@@ -0,0 +1,250 @@
+import copy
+import operator
+import threading
+import uuid
+from datetime import datetime, timezone
+from firebase_admin import firestore
+
+# ==========================================
+# FIRESTORE EN MEMORIA (PRUEBAS Y BENCHMARKS)
+# ==========================================
+# Imita el subconjunto del cliente de Firestore que usa la app: colecciones,
+# documentos, consultas (where / select / order_by / limit / start_after),
+# lotes, get_all y on_snapshot. Se activa con CERM_FIRESTORE=memoria y no
+# necesita credenciales ni red. Los datos viven solo mientras dure el proceso.
+# Los documentos guardados nunca se modifican en el lugar (cada escritura crea
+# un dict nuevo), así las lecturas no necesitan copiar toda la colección.
+MAX_ESCRITURAS_LOTE = 500
+
+_OPERADORES = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    "in": lambda valor, lista: valor in lista,
+}
+
+def _campo(datos, ruta):
+    valor = datos
+    for parte in ruta.split("."):
+        if not isinstance(valor, dict) or parte not in valor:
+            return None
+        valor = valor[parte]
+    return valor
+
+def _valor_orden(fila, campo):
+    """Valor de ordenamiento de (doc_id, datos); '__name__' es el id del documento."""
+    return fila[0] if campo == "__name__" else _campo(fila[1], campo)
+
+def _resolver(datos, ahora):
+    return {k: (ahora if v is firestore.SERVER_TIMESTAMP else copy.deepcopy(v)) for k, v in datos.items()}
+
+class _Tipo:
+    def __init__(self, nombre): self.name = nombre
+
+class CambioMemoria:
+    def __init__(self, tipo, documento):
+        self.type = _Tipo(tipo)
+        self.document = documento
+
+class InstantaneaMemoria:
+    def __init__(self, referencia, datos, campos=None):
+        self.reference = referencia
+        self.id = referencia.id
+        self.exists = datos is not None
+        self._datos = datos
+        self._campos = campos
+
+    def to_dict(self):
+        if self._datos is None: return None
+        if self._campos is None: return copy.deepcopy(self._datos)
+        return {k: copy.deepcopy(self._datos[k]) for k in self._campos if k in self._datos}
+
+    def get(self, campo):
+        return copy.deepcopy(_campo(self._datos or {}, campo))
+
+class EscuchaMemoria:
+    """Equivale al Watch de Firestore: is_active y unsubscribe()."""
+    def __init__(self, cliente, coleccion, doc_id, callback):
+        self.cliente, self.coleccion, self.doc_id, self.callback = cliente, coleccion, doc_id, callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        with self.cliente.lock:
+            self.cliente.escuchas.remove(self)
+
+class DocumentoMemoria:
+    def __init__(self, cliente, coleccion, doc_id):
+        self.cliente = cliente
+        self.coleccion = coleccion
+        self.id = doc_id
+        self.path = f"{coleccion}/{doc_id}"
+
+    def get(self, field_paths=None):
+        with self.cliente.lock:
+            datos = self.cliente.datos.get(self.coleccion, {}).get(self.id)
+            self.cliente.lecturas += 1
+        return InstantaneaMemoria(self, datos, field_paths)
+
+    def set(self, datos, merge=False):
+        self.cliente._aplicar([("set", self, datos, merge)])
+
+    def update(self, datos):
+        self.cliente._aplicar([("update", self, datos, False)])
+
+    def delete(self):
+        self.cliente._aplicar([("delete", self, None, False)])
+
+    def on_snapshot(self, callback):
+        return self.cliente._escuchar(self.coleccion, self.id, callback)
+
+class ConsultaMemoria:
+    def __init__(self, cliente, coleccion, filtros=(), orden=(), limite=None, campos=None, despues_de=None):
+        self.cliente = cliente
+        self.coleccion = coleccion
+        self._filtros = list(filtros)
+        self._orden = list(orden)
+        self._limite = limite
+        self._campos = campos
+        self._despues_de = despues_de
+
+    def _copia(self, **cambios):
+        estado = dict(filtros=self._filtros, orden=self._orden, limite=self._limite,
+                      campos=self._campos, despues_de=self._despues_de)
+        estado.update(cambios)
+        return ConsultaMemoria(self.cliente, self.coleccion, **estado)
+
+    def where(self, campo=None, op=None, valor=None, filter=None):
+        if filter is not None:
+            campo, op, valor = filter.field_path, filter.op_string, filter.value
+        return self._copia(filtros=self._filtros + [(campo, _OPERADORES[op], valor)])
+
+    def order_by(self, campo, direction="ASCENDING"):
+        return self._copia(orden=self._orden + [(campo, direction == firestore.Query.DESCENDING)])
+
+    def limit(self, cantidad):
+        return self._copia(limite=cantidad)
+
+    def select(self, campos):
+        return self._copia(campos=list(campos))
+
+    def start_after(self, instantanea):
+        return self._copia(despues_de=instantanea)
+
+    def stream(self):
+        with self.cliente.lock:
+            filas = list(self.cliente.datos.get(self.coleccion, {}).items())
+        # Firestore excluye los documentos que no tienen el campo filtrado u ordenado
+        for campo, comparar, valor in self._filtros:
+            filas = [f for f in filas if _campo(f[1], campo) is not None and comparar(_campo(f[1], campo), valor)]
+        for campo, _ in self._orden:
+            filas = [f for f in filas if _valor_orden(f, campo) is not None]
+        # Como Firestore: el desempate implícito por id sigue el sentido del último order_by
+        filas.sort(key=lambda f: f[0], reverse=bool(self._orden) and self._orden[-1][1])
+        for campo, descendente in reversed(self._orden):
+            filas.sort(key=lambda f: _valor_orden(f, campo), reverse=descendente)
+        if self._despues_de is not None:
+            ids = [f[0] for f in filas]
+            if self._despues_de.id in ids:
+                filas = filas[ids.index(self._despues_de.id) + 1:]
+        if self._limite is not None:
+            filas = filas[:self._limite]
+        self.cliente.lecturas += len(filas)
+        for doc_id, datos in filas:
+            yield InstantaneaMemoria(DocumentoMemoria(self.cliente, self.coleccion, doc_id), datos, self._campos)
+
+    def get(self):
+        return list(self.stream())
+
+    def on_snapshot(self, callback):
+        if self._filtros or self._orden or self._limite:
+            raise NotImplementedError("on_snapshot en memoria solo admite colecciones completas")
+        return self.cliente._escuchar(self.coleccion, None, callback)
+
+class ColeccionMemoria(ConsultaMemoria):
+    def document(self, doc_id=None):
+        return DocumentoMemoria(self.cliente, self.coleccion, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, datos):
+        ref = self.document()
+        ref.set(datos)
+        return datetime.now(timezone.utc), ref
+
+class LoteMemoria:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.operaciones = []
+
+    def set(self, ref, datos, merge=False): self.operaciones.append(("set", ref, datos, merge))
+    def update(self, ref, datos): self.operaciones.append(("update", ref, datos, False))
+    def delete(self, ref): self.operaciones.append(("delete", ref, None, False))
+
+    def commit(self):
+        if len(self.operaciones) > MAX_ESCRITURAS_LOTE:
+            raise ValueError(f"Un lote admite como máximo {MAX_ESCRITURAS_LOTE} escrituras")
+        self.cliente._aplicar(self.operaciones)
+        self.operaciones = []
+
+class ClienteMemoria:
+    """Reemplazo de firestore.Client con los datos en un dict por colección."""
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.datos = {}
+        self.escuchas = []
+        self.lecturas = 0
+        self.escrituras = 0
+
+    def collection(self, nombre):
+        return ColeccionMemoria(self, nombre)
+
+    def batch(self):
+        return LoteMemoria(self)
+
+    def get_all(self, referencias, field_paths=None):
+        return [ref.get(field_paths) for ref in referencias]
+
+    def _aplicar(self, operaciones):
+        ahora = datetime.now(timezone.utc)
+        cambios = []
+        with self.lock:
+            # Validar antes de escribir: el lote es atómico
+            for tipo, ref, _, _ in operaciones:
+                if tipo == "update" and ref.id not in self.datos.get(ref.coleccion, {}):
+                    raise KeyError(f"No existe el documento {ref.path}")
+            for tipo, ref, datos, merge in operaciones:
+                coleccion = self.datos.setdefault(ref.coleccion, {})
+                existia = ref.id in coleccion
+                if tipo == "delete":
+                    if not existia: continue
+                    anterior = coleccion.pop(ref.id)
+                    cambios.append(("REMOVED", ref, anterior))
+                    continue
+                nuevos = _resolver(datos, ahora)
+                if tipo == "update" or merge:
+                    nuevos = {**coleccion.get(ref.id, {}), **nuevos}
+                coleccion[ref.id] = nuevos
+                cambios.append(("MODIFIED" if existia else "ADDED", ref, coleccion[ref.id]))
+            self.escrituras += len(operaciones)
+            escuchas = list(self.escuchas)
+        self._notificar(escuchas, cambios)
+
+    # --- Listeners ---
+    def _escuchar(self, coleccion, doc_id, callback):
+        escucha = EscuchaMemoria(self, coleccion, doc_id, callback)
+        with self.lock:
+            self.escuchas.append(escucha)
+            docs = self.datos.get(coleccion, {})
+            ids = [doc_id] if doc_id is not None else list(docs)
+            instantaneas = [InstantaneaMemoria(DocumentoMemoria(self, coleccion, i), docs.get(i)) for i in ids]
+        cambios = [CambioMemoria("ADDED", s) for s in instantaneas if s.exists]
+        callback(instantaneas, cambios, datetime.now(timezone.utc))
+        return escucha
+
+    def _notificar(self, escuchas, cambios):
+        for escucha in escuchas:
+            if not escucha.is_active: continue
+            propios = [(tipo, ref, datos) for tipo, ref, datos in cambios
+                       if ref.coleccion == escucha.coleccion and escucha.doc_id in (None, ref.id)]
+            if not propios: continue
+            lista = [CambioMemoria(tipo, InstantaneaMemoria(ref, None if tipo == "REMOVED" else datos))
+                     for tipo, ref, datos in propios]
+            escucha.callback([c.document for c in lista], lista, datetime.now(timezone.utc))
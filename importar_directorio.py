@@ -0,0 +1,358 @@
+import pandas as pd
+import firebase_admin
+from firebase_admin import credentials, firestore
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+import argparse
+import hashlib
+import json
+import random
+import time
+import sys
+import os
+
+# Configuración de salida
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ==========================================
+# IMPORTADOR ÚNICO DEL PADRÓN (directorio_alumnos)
+# ==========================================
+# Reemplaza a migrar_firebase.py, migrar_v2.py y agregar_4to.py.
+# Uso:
+#   python importar_directorio.py Datoslimpios.csv                       (formato multigrado)
+#   python importar_directorio.py 1TO2.csv --formato por_grado --grado 1ro
+#   python importar_directorio.py 4TO.csv --formato por_grado --grado 4to
+#   python importar_directorio.py --completar-clave-orden                  (migración única del ranking)
+TAMANO_LOTE = 450        # Firestore acepta máximo 500 escrituras por lote
+TAMANO_BLOQUE = 5000     # Filas del CSV leídas por vez
+MAX_HILOS = 8            # Lotes confirmándose en paralelo
+REINTENTOS = 5
+
+CATEGORIA_POR_GRADO = {"1ro": "CAT 3", "2do": "CAT 3", "3ro": "CAT 2", "4to": "CAT 2", "5to": "CAT 1"}
+
+CAMPOS_ALUMNO = ["dni", "nombres", "apellidos", "nombre_completo", "grado", "categoria",
+                 "institucion", "ugel", "gestion", "docente"]
+
+# Mapeos de columnas. Pandas nombra las columnas repetidas agregando .1, .2, etc.
+# "grados": grado -> (nombres, apellidos, dni); None = grado indicado con --grado.
+FORMATOS = {
+    # Un colegio por fila con los 5 grados lado a lado y el docente al final
+    "multigrado": {
+        "institucion": "Nombre  la Institución Educativa",
+        "ugel": "UGEL a la que pertenece su I.E.",
+        "gestion": "Tipo de Gestión Educativa",
+        "grados": {
+            "1ro": ("Nombres",   "Apellidos",   "Número de DNI"),
+            "2do": ("Nombres.1", "Apellidos.1", "Número de DNI.1"),
+            "3ro": ("Nombres.2", "Apellidos.2", "Número de DNI.2"),
+            "4to": ("Nombres.3", "Apellidos.3", "Número de DNI.3"),
+            "5to": ("Nombres.4", "Apellidos.4", "Número de DNI.4"),
+        },
+        "docente": ("Nombres.5", "Apellidos.5"),
+        "titulo": False,
+    },
+    # Un alumno por fila (1TO2.csv, 4TO.csv); el docente es opcional
+    "por_grado": {
+        "institucion": "Nombre  la Institución Educativa",
+        "ugel": "UGEL",
+        "gestion": "Tipo de Gestión",
+        "grados": {None: ("Nombres", "Apellidos", "Número de DNI")},
+        "docente": ("Nombres.1", "Apellidos.1"),
+        "titulo": True,
+    },
+}
+
+# ==========================================
+# 1. CONEXIÓN A FIREBASE
+# ==========================================
+def conectar():
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        return firestore.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "cerm-2025"))
+    if not firebase_admin._apps:
+        if not os.path.exists("serviceAccountKey.json"):
+            print("❌ ERROR: Falta 'serviceAccountKey.json'.")
+            sys.exit(1)
+        firebase_admin.initialize_app(credentials.Certificate("serviceAccountKey.json"))
+    return firestore.client()
+
+# ==========================================
+# 2. LIMPIEZA VECTORIZADA
+# ==========================================
+def _texto(bloque, columna, titulo=False):
+    if columna is None or columna not in bloque.columns:
+        return pd.Series("", index=bloque.index)
+    serie = bloque[columna].fillna("").astype(str).str.strip()
+    return serie.str.title() if titulo else serie
+
+def limpiar_dni(serie):
+    """'71611170.0' / ' 7161 1170 ' -> '71611170'; lo que no sea un DNI queda vacío."""
+    dni = serie.fillna("").astype(str).str.replace(r"\s+", "", regex=True).str.replace(r"\.0+$", "", regex=True)
+    return dni.where(dni.str.fullmatch(r"\d{6,}"), "")
+
+def alumnos_de_bloque(bloque, formato, grado=None):
+    """Convierte un bloque del CSV en un DataFrame con CAMPOS_ALUMNO (un alumno por fila)."""
+    mapeo = FORMATOS[formato]
+    titulo = mapeo["titulo"]
+    institucion = _texto(bloque, mapeo["institucion"]).replace("", "No registrado")
+    ugel = _texto(bloque, mapeo["ugel"])
+    gestion = _texto(bloque, mapeo["gestion"])
+    col_nom, col_ape = mapeo["docente"]
+    docente = (_texto(bloque, col_nom) + " " + _texto(bloque, col_ape)).str.strip()
+    if titulo: docente = docente.str.title()
+    docente = docente.replace("", "No registrado")
+
+    partes = []
+    for grado_col, (nom, ape, dni) in mapeo["grados"].items():
+        g = grado_col or grado
+        nombres = _texto(bloque, nom, titulo)
+        apellidos = _texto(bloque, ape, titulo)
+        parte = pd.DataFrame({
+            "dni": limpiar_dni(bloque[dni]) if dni in bloque.columns else "",
+            "nombres": nombres,
+            "apellidos": apellidos,
+            "nombre_completo": apellidos + " " + nombres,
+            "grado": g,
+            "categoria": CATEGORIA_POR_GRADO[g],
+            "institucion": institucion,
+            "ugel": ugel,
+            "gestion": gestion,
+            "docente": docente,
+        }, index=bloque.index)
+        partes.append(parte[parte["dni"] != ""])
+    alumnos = pd.concat(partes, ignore_index=True)
+    return alumnos.drop_duplicates("dni", keep="last")[CAMPOS_ALUMNO]
+
+def leer_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Lee el CSV por bloques (el encabezado real está en la fila 2)."""
+    for bloque in pd.read_csv(archivo, sep=';', header=1, dtype=str, encoding='utf-8', chunksize=tamano_bloque):
+        bloque.columns = bloque.columns.str.strip()
+        yield bloque
+
+# ==========================================
+# 3. ESCRITURA CONCURRENTE POR LOTES
+# ==========================================
+def _confirmar_lote(db, coleccion, lote):
+    """Confirma un lote; reintenta con espera exponencial ante errores transitorios."""
+    for intento in range(REINTENTOS):
+        try:
+            batch = db.batch()
+            for doc_id, datos in lote:
+                ref = db.collection(coleccion).document(doc_id)
+                if datos is None: batch.delete(ref)  # None = eliminar
+                else: batch.set(ref, datos)
+            batch.commit()
+            return len(lote)
+        except Exception:
+            if intento == REINTENTOS - 1: raise
+            time.sleep(0.5 * 2 ** intento + random.random() * 0.5)
+
+class EscritorLotes:
+    """Agrupa escrituras en lotes y los confirma en paralelo con un pool acotado."""
+    def __init__(self, db, coleccion='directorio_alumnos', max_hilos=MAX_HILOS, al_progresar=None):
+        self.db = db
+        self.coleccion = coleccion
+        self.max_hilos = max_hilos
+        self.al_progresar = al_progresar
+        self.pool = ThreadPoolExecutor(max_workers=max_hilos)
+        self.lote = []
+        self.en_vuelo = {}
+        self.escritos = 0
+        self.fallidos = []
+
+    def poner(self, doc_id, datos):
+        self.lote.append((doc_id, datos))
+        if len(self.lote) >= TAMANO_LOTE: self._enviar()
+
+    def _enviar(self):
+        if not self.lote: return
+        # Como máximo 2 lotes por hilo en memoria; si no, esperar a que termine alguno
+        while len(self.en_vuelo) >= self.max_hilos * 2:
+            self._recoger(FIRST_COMPLETED)
+        lote, self.lote = self.lote, []
+        futuro = self.pool.submit(_confirmar_lote, self.db, self.coleccion, lote)
+        self.en_vuelo[futuro] = lote
+
+    def _recoger(self, modo):
+        hechos, _ = wait(list(self.en_vuelo), return_when=modo)
+        for futuro in hechos:
+            lote = self.en_vuelo.pop(futuro)
+            try:
+                self.escritos += futuro.result()
+            except Exception as e:
+                print(f"⚠️ Lote de {len(lote)} falló tras {REINTENTOS} intentos: {e}")
+                self.fallidos.extend(doc_id for doc_id, _ in lote)
+            if self.al_progresar: self.al_progresar(self.escritos)
+
+    def esperar(self):
+        """Envía lo pendiente y espera a que se confirme todo lo que está en vuelo."""
+        self._enviar()
+        if self.en_vuelo: self._recoger(ALL_COMPLETED)
+
+    def cerrar(self):
+        self.esperar()
+        self.pool.shutdown()
+
+# ==========================================
+# 4. SINCRONIZACIÓN INCREMENTAL (HUELLAS)
+# ==========================================
+# Cada alumno guarda 'huella' (sha1 de CAMPOS_ALUMNO); solo se escriben los
+# alumnos nuevos o cuya huella cambió. El manifiesto local es opcional y evita
+# leer las huellas de Firestore en cada corrida.
+def huellas_de(alumnos):
+    texto = alumnos[CAMPOS_ALUMNO].astype(str).agg("\x1f".join, axis=1)
+    return texto.map(lambda t: hashlib.sha1(t.encode("utf-8")).hexdigest()[:16])
+
+def cargar_huellas(db, manifiesto=None):
+    """dni -> (huella, grado) de lo ya guardado: del manifiesto si existe, si no de Firestore."""
+    if manifiesto and os.path.exists(manifiesto):
+        with open(manifiesto, encoding="utf-8") as f:
+            return {dni: tuple(valor) for dni, valor in json.load(f).items()}
+    consulta = db.collection('directorio_alumnos').select(["huella", "grado"])
+    huellas = {}
+    for doc in consulta.stream():
+        datos = doc.to_dict()
+        huellas[doc.id] = (datos.get("huella"), datos.get("grado"))
+    return huellas
+
+def guardar_manifiesto(manifiesto, huellas):
+    temporal = manifiesto + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(huellas, f)
+    os.replace(temporal, manifiesto)
+
+# ==========================================
+# 5. IMPORTACIÓN
+# ==========================================
+def importar(db, archivo, formato="multigrado", grado=None, max_hilos=MAX_HILOS,
+             tamano_bloque=TAMANO_BLOQUE, al_progresar=None, manifiesto=None, eliminar=False):
+    """
+    Sincroniza el CSV con 'directorio_alumnos' escribiendo solo los cambios.
+    Los 'removidos' son alumnos guardados de los grados del archivo que ya no
+    aparecen en él; solo se borran con eliminar=True.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    if None in FORMATOS[formato]["grados"] and grado not in CATEGORIA_POR_GRADO:
+        raise ValueError("El formato por_grado requiere --grado (1ro..5to).")
+
+    previas = cargar_huellas(db, manifiesto)
+    actuales = {}
+    resumen = {"leidos": 0, "insertados": 0, "actualizados": 0, "sin_cambios": 0, "removidos": 0, "eliminados": 0}
+    escritor = EscritorLotes(db, max_hilos=max_hilos, al_progresar=al_progresar)
+    try:
+        for bloque in leer_bloques(archivo, tamano_bloque):
+            resumen["leidos"] += len(bloque)
+            alumnos = alumnos_de_bloque(bloque, formato, grado)
+            alumnos["huella"] = huellas_de(alumnos)
+            # Un DNI repetido en otro bloque debe escribirse después del anterior
+            if not actuales.keys().isdisjoint(alumnos["dni"]):
+                escritor.esperar()
+            for registro in alumnos.to_dict("records"):
+                dni, huella = registro["dni"], registro["huella"]
+                primera_vez = dni not in actuales
+                anterior = previas.get(dni) if primera_vez else actuales[dni]
+                actuales[dni] = (huella, registro["grado"])
+                if anterior is not None and anterior[0] == huella:
+                    if primera_vez: resumen["sin_cambios"] += 1
+                    continue
+                if primera_vez:
+                    resumen["actualizados" if dni in previas else "insertados"] += 1
+                escritor.poner(dni, registro)
+
+        grados = {g for _, g in actuales.values()}
+        removidos = [dni for dni, (_, g) in previas.items() if g in grados and dni not in actuales]
+        resumen["removidos"] = len(removidos)
+        if eliminar:
+            for dni in removidos: escritor.poner(dni, None)
+    finally:
+        escritor.cerrar()
+
+    if eliminar:
+        resumen["eliminados"] = len(set(removidos) - set(escritor.fallidos))
+    resumen["fallidos"] = escritor.fallidos
+    if manifiesto:
+        final = dict(previas)
+        final.update(actuales)
+        if eliminar:
+            for dni in removidos: final.pop(dni, None)
+        for dni in escritor.fallidos: final.pop(dni, None)  # se reintentan en la próxima corrida
+        guardar_manifiesto(manifiesto, final)
+    return resumen
+
+# ==========================================
+# 6. MIGRACIÓN: 'clave_orden' EN PARTICIPANTES
+# ==========================================
+def completar_clave_orden(db, al_progresar=None):
+    """
+    Escribe 'clave_orden' en los participantes guardados antes de que existiera
+    (o con un valor desactualizado), para que el ranking paginado los incluya.
+    Devuelve (revisados, actualizados).
+    """
+    from utils import clave_orden  # mismo criterio que la aplicación
+    consulta = db.collection('participantes').select(['metricas', 'info_registro', 'clave_orden'])
+    revisados, cambios = 0, []
+    for doc in consulta.stream():
+        revisados += 1
+        datos = doc.to_dict()
+        clave = clave_orden(datos)
+        if datos.get('clave_orden') != clave:
+            cambios.append((doc.id, clave))
+    for inicio in range(0, len(cambios), TAMANO_LOTE):
+        batch = db.batch()
+        for dni, clave in cambios[inicio:inicio + TAMANO_LOTE]:
+            batch.update(db.collection('participantes').document(dni), {'clave_orden': clave})
+        batch.commit()
+        if al_progresar: al_progresar(min(inicio + TAMANO_LOTE, len(cambios)))
+    return revisados, len(cambios)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza el padrón de alumnos con 'directorio_alumnos'.")
+    parser.add_argument("archivo", nargs="?", help="CSV separado por ';' (encabezado en la fila 2)")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="multigrado")
+    parser.add_argument("--grado", choices=list(CATEGORIA_POR_GRADO), help="Grado fijo para el formato por_grado")
+    parser.add_argument("--hilos", type=int, default=MAX_HILOS, help="Lotes confirmándose en paralelo")
+    parser.add_argument("--manifiesto", help="JSON local con las huellas ya subidas (evita leerlas de Firestore)")
+    parser.add_argument("--eliminar", action="store_true", help="Borra los alumnos de esos grados que ya no están en el archivo")
+    parser.add_argument("--completar-clave-orden", action="store_true",
+                        help="Solo completa 'clave_orden' en 'participantes' (documentos antiguos) y termina")
+    args = parser.parse_args()
+
+    if args.completar_clave_orden:
+        db = conectar()
+        revisados, actualizados = completar_clave_orden(
+            db, al_progresar=lambda n: print(f"   -> {n} participantes actualizados..."))
+        print(f"🔢 clave_orden: {actualizados} de {revisados} participantes actualizados.")
+        sys.exit(0)
+    if not args.archivo:
+        parser.error("falta el archivo CSV")
+
+    print(f"--- 🚀 SINCRONIZANDO PADRÓN DESDE {args.archivo} ({args.formato}) ---")
+    if not os.path.exists(args.archivo):
+        print(f"❌ ERROR: No encuentro '{args.archivo}'.")
+        sys.exit(1)
+
+    db = conectar()
+    print("✅ Conexión a Firebase establecida.")
+
+    def al_progresar(escritos):
+        print(f"   -> {escritos} escrituras confirmadas...")
+
+    try:
+        resumen = importar(db, args.archivo, args.formato, args.grado, args.hilos,
+                           al_progresar=al_progresar, manifiesto=args.manifiesto, eliminar=args.eliminar)
+    except Exception as e:
+        print(f"❌ Error importando: {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 50)
+    print("🎉 SINCRONIZACIÓN COMPLETADA")
+    print(f"📄 Filas leídas: {resumen['leidos']}")
+    print(f"🆕 Insertados: {resumen['insertados']}")
+    print(f"✏️ Actualizados: {resumen['actualizados']}")
+    print(f"➖ Sin cambios: {resumen['sin_cambios']}")
+    if args.eliminar:
+        print(f"🗑️ Eliminados: {resumen['eliminados']} de {resumen['removidos']} ausentes del archivo")
+    else:
+        print(f"ℹ️  Ausentes del archivo: {resumen['removidos']} (use --eliminar para borrarlos)")
+    if resumen["fallidos"]:
+        print(f"⚠️ No se pudieron guardar {len(resumen['fallidos'])} alumnos (vuelva a ejecutar el comando).")
+    print("=" * 50)
@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+# Configuración de salida
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ==========================================
+# IMPORTACIÓN MASIVA DE HOJAS DE RESPUESTAS (CLI)
+# ==========================================
+# Uso:
+#   python importar_respuestas.py hojas.xlsx                 -> solo simulación
+#   python importar_respuestas.py hojas.csv --confirmar      -> guarda en Firestore
+#   python importar_respuestas.py hojas.csv --reporte r.csv  -> exporta la simulación
+parser = argparse.ArgumentParser(description="Importa hojas de respuestas (DNI + 20 respuestas + hora).")
+parser.add_argument("archivo", help="CSV o XLSX con columnas DNI, Hora y Respuestas (o P1..P20)")
+parser.add_argument("--confirmar", action="store_true", help="Escribe en 'participantes' (sin esto solo simula)")
+parser.add_argument("--reporte", help="Ruta donde guardar el reporte de la simulación (CSV)")
+args = parser.parse_args()
+
+import utils
+
+print(f"--- 📥 IMPORTANDO HOJAS DESDE {args.archivo} ---")
+
+try:
+    df_hojas = utils.leer_archivo_respuestas(args.archivo)
+    registros, reporte = utils.preparar_importacion(df_hojas)
+except Exception as e:
+    print(f"❌ Error procesando el archivo: {e}")
+    sys.exit(1)
+
+conteo = reporte["Estado"].value_counts()
+print(f"🆕 Nuevos: {conteo.get('Nuevo', 0)}")
+print(f"✏️ Actualizan: {conteo.get('Actualiza', 0)}")
+print(f"➖ Sin cambios: {conteo.get('Sin cambios', 0)}")
+print(f"⚠️ Errores: {conteo.get('Error', 0)}")
+
+errores = reporte[reporte["Estado"] == "Error"]
+for _, fila in errores.head(20).iterrows():
+    print(f"   - DNI {fila['DNI'] or '(vacío)'}: {fila['Detalle']}")
+if len(errores) > 20:
+    print(f"   ... y {len(errores) - 20} errores más.")
+
+if args.reporte:
+    reporte.to_csv(args.reporte, index=False, encoding="utf-8-sig")
+    print(f"📝 Reporte guardado en {args.reporte}")
+
+if not args.confirmar:
+    print("ℹ️ Simulación terminada. Use --confirmar para guardar.")
+    sys.exit(0)
+
+def al_progresar(hechos, total):
+    print(f"📦 Guardados {hechos}/{total}...")
+
+guardados = utils.confirmar_importacion(registros, al_progresar)
+print(f"🎉 ¡ÉXITO! {guardados} exámenes importados.")
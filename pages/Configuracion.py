@@ -1,7 +1,6 @@
 import streamlit as st
 from styles import load_styles
 import utils
-import pandas as pd
 
 # 1. Estilos y Configuración
 load_styles()
@@ -49,6 +48,18 @@ def seccion_categoria(categoria, titulo, color_tab):
     if st.button(f"💾 Guardar Claves {categoria}", type="primary", use_container_width=True):
         if utils.guardar_categoria_individual(categoria, respuestas_temp):
             st.success(f"✅ ¡Claves de Categoría {categoria} actualizadas!")
+
+            # Recalificar exámenes ya registrados con la clave nueva
+            barra = st.progress(0, text=f"Recalificando participantes de {categoria}...")
+            def al_progresar(hechos, total):
+                avance = hechos / total if total else 1.0
+                barra.progress(avance, text=f"Recalificando {categoria}: {hechos}/{total} exámenes actualizados")
+            try:
+                revisados, actualizados = utils.recalificar_categoria(categoria, respuestas_temp, al_progresar)
+                st.toast(f"🔁 {categoria}: {actualizados} de {revisados} exámenes recalificados.")
+            except Exception as e:
+                st.error(f"⚠️ La clave se guardó, pero falló la recalificación: {e}")
+                st.stop()
             st.balloons()
             st.rerun() 
         else:
@@ -77,10 +88,8 @@ with tab_hist:
     historial = utils.obtener_historial()
     
     if historial:
-        df_hist = pd.DataFrame(historial)
-        if not df_hist.empty:
-            df_show = df_hist[["fecha", "categoria", "claves_guardadas"]]
-            df_show.columns = ["Fecha/Hora", "Cat", "Patrón Guardado"]
-            st.dataframe(df_show, use_container_width=True)
+        filas = [{"Fecha/Hora": h.get("fecha"), "Cat": h.get("categoria"), "Patrón Guardado": h.get("claves_guardadas")}
+                 for h in historial]
+        st.dataframe(filas, use_container_width=True)
     else:
         st.info("No hay cambios registrados todavía.")
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
 from styles import load_styles
+from componentes import buscador_estudiantes, hoja_respuestas
 import utils
-import pandas as pd
 from datetime import datetime
 
 # Configuración y Estilos
@@ -40,11 +40,8 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# --- 1. CARGAR DIRECTORIO ---
-try:
-    df_busqueda = utils.cargar_directorio_csv()
-except:
-    df_busqueda = pd.DataFrame()
+# --- 1. CARGAR DIRECTORIO (indexado por DNI) ---
+mapa_directorio = utils.cargar_mapa_directorio()
 
 # Variables por defecto
 def_nombre = ""
@@ -62,22 +59,24 @@ col_b1, col_b2 = st.columns([3, 1])
 
 with col_b1:
     seleccion = None
-    if not df_busqueda.empty:
-        # Creamos una columna temporal para buscar fácil
-        df_busqueda['busqueda'] = df_busqueda['dni'].astype(str) + " | " + df_busqueda['nombre_completo']
-        lista_opciones = [""] + df_busqueda['busqueda'].tolist()
-        
-        seleccion = st.selectbox("Escribe DNI o Nombre para buscar:", lista_opciones, index=0)
+    if mapa_directorio:
+        seleccion = buscador_estudiantes("sb_directorio", "Resultados de la búsqueda:")
+
+with col_b2:
+    st.write("")
+    st.write("")
+    if st.button("🔄 Recargar Padrón", help="Vuelve a leer el directorio desde la base de datos", use_container_width=True):
+        utils.invalidar_directorio()
+        st.rerun()
 
 # Lógica de Autocompletado
 if seleccion:
-    dni_sel = seleccion.split(" | ")[0]
-    # Filtramos el dataframe para encontrar al alumno
-    fila = df_busqueda[df_busqueda['dni'] == dni_sel]
+    dni_sel = utils.normalizar_dni(seleccion.split(" | ")[0])
+    # Búsqueda directa por DNI canónico
+    reg = mapa_directorio.get(dni_sel)
     
-    if not fila.empty:
-        reg = fila.iloc[0]
-        def_dni = str(reg.get('dni', ''))
+    if reg:
+        def_dni = reg['dni']
         def_nombre = reg.get('nombre_completo', '')
         def_inst = reg.get('institucion', '')
         def_ugel = reg.get('ugel', '')
@@ -85,82 +84,63 @@ if seleccion:
         def_grado = reg.get('grado', '5to')
         def_cat = reg.get('categoria', 'CAT 1')
         
-        # --- AQUÍ ESTÁ EL CAMBIO IMPORTANTE ---
-        # Recuperamos el docente. Si no existe o es NaN, ponemos vacío.
-        val_doc = reg.get('docente', '')
-        if pd.notna(val_doc) and str(val_doc).strip() != "" and str(val_doc) != "nan":
-            def_docente = str(val_doc)
-        else:
-            def_docente = "No registrado"
+        # Docente ya normalizado en el mapa ("No registrado" si falta)
+        def_docente = reg['docente']
             
         st.success(f"✅ Datos cargados de: **{def_nombre}**")
 
 st.markdown("---")
 
 # --- 3. FORMULARIO DE REGISTRO ---
-with st.form("form_registro"):
-    c1, c2, c3 = st.columns(3)
-    
-    with c1:
-        dni = st.text_input("DNI del Estudiante:", value=def_dni)
-        nombre = st.text_input("Apellidos y Nombres:", value=def_nombre)
-        institucion = st.text_input("Institución Educativa:", value=def_inst)
-    
-    with c2:
-        grado = st.selectbox("Grado:", ["1ro", "2do", "3ro", "4to", "5to"], index=["1ro", "2do", "3ro", "4to", "5to"].index(def_grado) if def_grado in ["1ro", "2do", "3ro", "4to", "5to"] else 4)
-        categoria = st.selectbox("Categoría:", ["CAT 1", "CAT 2", "CAT 3"], index=["CAT 1", "CAT 2", "CAT 3"].index(def_cat) if def_cat in ["CAT 1", "CAT 2", "CAT 3"] else 0)
-        # Input del Docente con el valor autocompletado
-        val_docente = st.text_input("Docente Asesor:", value=def_docente, help="Nombre del profesor asesor")
-
-    with c3:
-        ugel = st.text_input("UGEL:", value=def_ugel)
-        gestion = st.selectbox("Gestión:", ["Pública", "Privada"], index=0 if def_gestion.lower() == "pública" or def_gestion == "" else 1)
-        hora_entrega = datetime.now().strftime("%H:%M:%S")
-        st.info(f"🕒 Hora de registro: {hora_entrega}")
-
-    st.markdown("### 📝 Hoja de Respuestas")
+# Sin st.form: los datos personales recargan la página (cambian una vez por
+# alumno) y la hoja de respuestas es un fragmento que se ejecuta sola.
+c1, c2, c3 = st.columns(3)
+
+with c1:
+    dni = st.text_input("DNI del Estudiante:", value=def_dni)
+    nombre = st.text_input("Apellidos y Nombres:", value=def_nombre)
+    institucion = st.text_input("Institución Educativa:", value=def_inst)
+
+with c2:
+    grado = st.selectbox("Grado:", ["1ro", "2do", "3ro", "4to", "5to"], index=["1ro", "2do", "3ro", "4to", "5to"].index(def_grado) if def_grado in ["1ro", "2do", "3ro", "4to", "5to"] else 4)
+    categoria = st.selectbox("Categoría:", ["CAT 1", "CAT 2", "CAT 3"], index=["CAT 1", "CAT 2", "CAT 3"].index(def_cat) if def_cat in ["CAT 1", "CAT 2", "CAT 3"] else 0)
+    # Input del Docente con el valor autocompletado
+    val_docente = st.text_input("Docente Asesor:", value=def_docente, help="Nombre del profesor asesor")
+
+with c3:
+    ugel = st.text_input("UGEL:", value=def_ugel)
+    gestion = st.selectbox("Gestión:", ["Pública", "Privada"], index=0 if def_gestion.lower() == "pública" or def_gestion == "" else 1)
+    st.info("🕒 La hora de registro se toma al guardar.")
+
+st.markdown("### 📝 Hoja de Respuestas")
+
+def guardar(respuestas, _):
+    if nombre == "" or dni == "":
+        st.error("⚠️ Nombre y DNI son obligatorios.")
+        return
+    patron = utils.obtener_patron_respuestas(categoria)
+    if patron is None:
+        st.error("⚠️ Configure la clave de respuestas primero en 'Configuración'.")
+        return
+    total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
+    hora_entrega = datetime.now().strftime("%H:%M:%S")
     
-    # Generación dinámica de inputs para respuestas (1-20)
-    filas_resp = [st.columns(5) for _ in range(4)]
-    respuestas = []
+    datos = {
+        "alumno": {
+            "dni": dni, "nombres": nombre, "colegio": institucion,
+            "grado": grado, "categoria": categoria,
+            "ugel": ugel, "gestion": gestion,
+            "docente": val_docente # Guardamos el docente en la base de datos de resultados
+        },
+        "examen": {"respuestas": respuestas},
+        "metricas": {"total_puntos": total, "correctas": ok, "incorrectas": bad, "en_blanco": blank},
+        "info_registro": {"hora_entrega": hora_entrega}
+    }
     
-    for i in range(1, 21):
-        fila_idx = (i - 1) // 5
-        col_idx = (i - 1) % 5
-        
-        with filas_resp[fila_idx][col_idx]:
-            st.markdown(f"""<div class="question-box"><span class="question-label">Pregunta {i}</span></div>""", unsafe_allow_html=True)
-            resp = st.selectbox(f"P{i}", ["", "A", "B", "C", "D", "E"], key=f"resp_{i}", label_visibility="collapsed")
-            respuestas.append(resp)
-
-    st.markdown("---")
-    submitted = st.form_submit_button("💾 Guardar Participante", type="primary", use_container_width=True)
-
-    if submitted:
-        if nombre == "" or dni == "":
-            st.error("⚠️ Nombre y DNI son obligatorios.")
-        else:
-            patron = utils.obtener_patron_respuestas(categoria)
-            if patron is None:
-                st.error("⚠️ Configure la clave de respuestas primero en 'Configuración'.")
-            else:
-                total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
-                
-                datos = {
-                    "alumno": {
-                        "dni": dni, "nombres": nombre, "colegio": institucion,
-                        "grado": grado, "categoria": categoria,
-                        "ugel": ugel, "gestion": gestion,
-                        "docente": val_docente # Guardamos el docente en la base de datos de resultados
-                    },
-                    "examen": {"respuestas": respuestas},
-                    "metricas": {"total_puntos": total, "correctas": ok, "incorrectas": bad, "en_blanco": blank},
-                    "info_registro": {"hora_entrega": hora_entrega}
-                }
-                
-                if utils.guardar_alumno(datos):
-                    st.success(f"✅ Registrado Exitosamente. Puntaje: {total}")
-                    st.balloons()
-                    # Opcional: limpiar form
-                else:
-                    st.error("❌ Error al guardar en la base de datos.")
\ No newline at end of file
+    if utils.guardar_alumno(datos):
+        st.success(f"✅ Registrado Exitosamente a las {hora_entrega}. Puntaje: {total}")
+        st.balloons()
+    else:
+        st.error("❌ Error al guardar en la base de datos.")
+
+hoja_respuestas("resp", categoria, guardar, con_hora=False, por_fila=5, etiqueta="Pregunta {}")
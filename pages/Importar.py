@@ -0,0 +1,77 @@
+import streamlit as st
+from styles import load_styles
+import utils
+import hashlib
+
+# 1. Configuración
+load_styles()
+st.set_page_config(page_title="Importar Hojas - CERM 2025", layout="wide")
+
+st.markdown("""
+<div class="header-container">
+    <h1 class="header-title">📥 Importación Masiva de Hojas</h1>
+    <p class="header-subtitle">Carga un CSV/XLSX con DNI, 20 respuestas y hora de entrega; revisa la simulación y confirma.</p>
+</div>
+""", unsafe_allow_html=True)
+
+st.caption("Columnas esperadas: **DNI**, **Hora** (HH:MM) y **Respuestas** (20 caracteres, '_' = blanco) o **P1..P20**.")
+
+# 2. Archivo
+archivo = st.file_uploader("Archivo de hojas de respuestas", type=["csv", "xlsx"])
+if archivo is None:
+    st.session_state.pop("importacion", None)
+    st.stop()
+
+# 3. Simulación (se calcula una vez por archivo)
+contenido = archivo.getvalue()
+huella = hashlib.sha1(contenido).hexdigest()
+if st.session_state.get("importacion", {}).get("huella") != huella:
+    try:
+        with st.spinner("Validando y calificando..."):
+            df_hojas = utils.leer_archivo_respuestas(archivo, archivo.name)
+            registros, reporte = utils.preparar_importacion(df_hojas)
+    except Exception as e:
+        st.error(f"No se pudo procesar el archivo: {e}")
+        st.stop()
+    st.session_state.importacion = {"huella": huella, "registros": registros, "reporte": reporte}
+
+registros = st.session_state.importacion["registros"]
+reporte = st.session_state.importacion["reporte"]
+conteo = reporte["Estado"].value_counts()
+
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("🆕 Nuevos", int(conteo.get("Nuevo", 0)))
+k2.metric("✏️ Actualizan", int(conteo.get("Actualiza", 0)))
+k3.metric("➖ Sin cambios", int(conteo.get("Sin cambios", 0)))
+k4.metric("⚠️ Errores", int(conteo.get("Error", 0)))
+
+filtro_estado = st.multiselect("Mostrar:", ["Nuevo", "Actualiza", "Sin cambios", "Error"], default=["Nuevo", "Actualiza", "Error"])
+st.dataframe(
+    reporte[reporte["Estado"].isin(filtro_estado)],
+    use_container_width=True,
+    column_config={
+        "Puntaje": st.column_config.ProgressColumn("Puntaje", format="%d pts", min_value=0, max_value=100)
+    }
+)
+st.download_button(
+    "⬇️ Descargar reporte de la simulación",
+    reporte.to_csv(index=False).encode("utf-8-sig"),
+    file_name="simulacion_importacion.csv",
+    mime="text/csv"
+)
+
+# 4. Confirmación
+st.write("")
+if st.button(f"💾 Confirmar importación ({len(registros)} registros)", type="primary",
+             disabled=not registros, use_container_width=True):
+    barra = st.progress(0, text="Guardando...")
+    def al_progresar(hechos, total):
+        barra.progress(hechos / total, text=f"Guardados {hechos}/{total}")
+    try:
+        guardados = utils.confirmar_importacion(registros, al_progresar)
+    except Exception as e:
+        st.error(f"Error durante la importación: {e}")
+        st.stop()
+    st.session_state.pop("importacion", None)
+    st.success(f"✅ {guardados} exámenes importados.")
+    st.balloons()
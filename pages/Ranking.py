@@ -0,0 +1,94 @@
+import streamlit as st
+from styles import load_styles
+import utils
+import pandas as pd
+
+# 1. Configuración
+load_styles()
+st.set_page_config(page_title="Ranking por Categoría", layout="wide")
+
+st.markdown("""
+<div class="header-container">
+    <h1 class="header-title">🏅 Ranking por Categoría</h1>
+    <p class="header-subtitle">Vista para jurados: consulta solo la categoría y grado elegidos, página por página.</p>
+</div>
+""", unsafe_allow_html=True)
+
+TAMANO_PAGINA = 50
+
+# 2. Filtros (se resuelven en el servidor)
+c_cat, c_grado, c_pag = st.columns([2, 2, 2])
+with c_cat:
+    filtro_cat = st.selectbox("Categoría:", ["CAT 1", "CAT 2", "CAT 3"])
+with c_grado:
+    filtro_grado = st.selectbox("Grado:", ["Todos", "1ro", "2do", "3ro", "4to", "5to"])
+
+# Cursores de paginación por combinación de filtros:
+# cursores[i] = último documento de la página i-1 (None para la primera)
+filtros = (filtro_cat, filtro_grado)
+if st.session_state.get("ranking_filtros") != filtros:
+    st.session_state.ranking_filtros = filtros
+    st.session_state.ranking_cursores = [None]
+    st.session_state.ranking_pagina = 0
+
+pagina = st.session_state.ranking_pagina
+try:
+    filas, siguiente = utils.consultar_ranking(
+        categoria=filtro_cat,
+        grado=None if filtro_grado == "Todos" else filtro_grado,
+        tamano=TAMANO_PAGINA,
+        despues_de=st.session_state.ranking_cursores[pagina]
+    )
+except Exception as e:
+    st.error(f"Error consultando el ranking: {e}")
+    filas, siguiente = [], None
+
+with c_pag:
+    st.write("")
+    st.write("")
+    st.markdown(f"**Página {pagina + 1}**")
+
+# 3. Tabla
+if filas:
+    data_list = []
+    for p in filas:
+        metricas = p.get("metricas", {})
+        data_list.append({
+            "DNI": utils.normalizar_dni(p.get("dni", "")),
+            "Estudiante": p.get("nombre"),
+            "Puntaje": metricas.get("total_puntos", 0),
+            "Correctas": metricas.get("correctas", 0),
+            "Incorrectas": metricas.get("incorrectas", 0),
+            "En Blanco": metricas.get("en_blanco", 0),
+            "Hora": p.get("info_registro", {}).get("hora_entrega", "23:59:59"),
+            "Grado": p.get("grado"),
+            "Colegio": p.get("colegio"),
+        })
+    df_pagina = pd.DataFrame(data_list)
+    df_pagina.index += pagina * TAMANO_PAGINA + 1
+
+    st.dataframe(
+        df_pagina,
+        use_container_width=True,
+        column_config={
+            "Puntaje": st.column_config.ProgressColumn("Puntaje", format="%d pts", min_value=0, max_value=100),
+            "Hora": st.column_config.TextColumn("Hora de Entrega", help="Hora de finalización del examen (criterio de desempate)"),
+            "Incorrectas": st.column_config.NumberColumn("Erradas", help="Respuestas incorrectas")
+        }
+    )
+else:
+    st.info("No hay resultados para esta selección.")
+
+# 4. Navegación
+c_ant, c_vacio, c_sig = st.columns([1, 3, 1])
+with c_ant:
+    if st.button("⬅️ Anterior", disabled=pagina == 0, use_container_width=True):
+        st.session_state.ranking_pagina -= 1
+        st.rerun()
+with c_sig:
+    if st.button("Siguiente ➡️", disabled=siguiente is None, use_container_width=True):
+        cursores = st.session_state.ranking_cursores
+        del cursores[pagina + 1:]
+        cursores.append(siguiente)
+        st.session_state.ranking_pagina += 1
+        st.rerun()
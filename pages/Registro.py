@@ -1,8 +1,7 @@
 import streamlit as st
 from styles import load_styles
+from componentes import buscador_estudiantes, limpiar_buscador, hoja_respuestas, hora_actual_en_rango, registro_rapido
 import utils
-import pandas as pd
-from datetime import datetime
 
 # Configuración y Estilos
 load_styles()
@@ -40,26 +39,21 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# --- 1. CARGAR DIRECTORIO ---
-try:
-    df_busqueda = utils.cargar_directorio_csv()
-except:
-    df_busqueda = pd.DataFrame()
+# --- MODO RÁPIDO: DNI + 20 respuestas con el teclado ---
+if st.toggle("⚡ Modo rápido (solo teclado)", key="modo_rapido",
+             help="Un campo para el DNI y otro para las 20 respuestas; Enter guarda y pasa a la siguiente hoja."):
+    registro_rapido()
+    st.stop()
+
+# --- 1. CARGAR DIRECTORIO (indexado por DNI) ---
+mapa_directorio = utils.cargar_mapa_directorio()
 
 # --- 2. BUSCADOR ---
 st.markdown("### 🔍 Buscar Estudiante")
 col_busq, col_btn = st.columns([5, 1])
 
-if not df_busqueda.empty:
-    df_busqueda['dni_str'] = df_busqueda['dni'].astype(str).str.strip()
-    opciones_busqueda = df_busqueda.apply(lambda x: f"{x['dni_str']} | {x['nombre_completo']}", axis=1).tolist()
-    opciones_busqueda.insert(0, "")
-else:
-    opciones_busqueda = [""]
-
 def limpiar_todo():
-    if "sb_buscador" in st.session_state:
-        st.session_state.sb_buscador = opciones_busqueda[0]
+    limpiar_buscador("sb_buscador")
 
 with col_btn:
     st.write("") 
@@ -67,7 +61,7 @@ with col_btn:
     st.button("🧹 Limpiar", on_click=limpiar_todo, help="Borrar búsqueda y limpiar campos", use_container_width=True)
 
 with col_busq:
-    seleccion = st.selectbox("Seleccione un estudiante:", opciones_busqueda, key="sb_buscador")
+    seleccion = buscador_estudiantes("sb_buscador")
 
 # Variables por defecto
 val_dni = ""
@@ -81,152 +75,91 @@ val_docente = "No registrado"
 
 # Si hay selección
 if seleccion and seleccion != "":
-    dni_seleccionado = seleccion.split(" | ")[0].strip()
-    datos_alumno = df_busqueda[df_busqueda['dni_str'] == dni_seleccionado]
+    dni_seleccionado = utils.normalizar_dni(seleccion.split(" | ")[0])
+    fila = mapa_directorio.get(dni_seleccionado)
     
-    if not datos_alumno.empty:
-        fila = datos_alumno.iloc[0]
-        val_dni = str(fila['dni'])
-        val_nombre = str(fila['nombre_completo'])
-        val_inst = str(fila['institucion'])
-        val_ugel = str(fila['ugel'])
-        val_gestion = str(fila['gestion'])
-        val_grado = str(fila['grado'])
-        val_cat = str(fila['categoria']) 
-        val_docente = str(fila.get('docente', 'No registrado'))
-        if val_docente == "nan": val_docente = "No registrado"
+    if fila:
+        val_dni = fila['dni']
+        val_nombre = fila['nombre_completo']
+        val_inst = fila['institucion']
+        val_ugel = fila['ugel']
+        val_gestion = fila['gestion']
+        val_grado = fila['grado']
+        val_cat = fila['categoria']
+        val_docente = fila['docente']
         
         st.success(f"✅ Datos cargados: **{val_nombre}**")
 
 # --- 4. FORMULARIO ---
+# Sin st.form: los datos personales recargan la página (cambian una vez por
+# alumno) y la hoja de respuestas es un fragmento que se ejecuta sola.
 st.markdown("---")
-with st.form("form_registro"):
-    # Sección de Datos
-    st.markdown("#### 👤 Datos Personales")
-    c1, c2 = st.columns(2)
-
-    with c1:
-        dni = st.text_input("🆔 DNI / Código", value=val_dni)
-        nombre = st.text_input("👤 Apellidos y Nombres", value=val_nombre)
-        institucion = st.text_input("🏫 Institución Educativa", value=val_inst)
-        ugel = st.text_input("📍 UGEL", value=val_ugel)
-
-    with c2:
-        # Grado
-        grados_opts = ["1ro", "2do", "3ro", "4to", "5to"]
-        idx_grado = grados_opts.index(val_grado) if val_grado in grados_opts else 0
-        grado = st.selectbox("🎓 Grado / Año", grados_opts, index=idx_grado)
-        
-        # Categoría Automática (Lógica visual dentro del form para referencia)
-        # Nota: Al guardar usaremos la lógica final, aquí es para mostrar opciones correctas
-        cat_opts = ["CAT 1", "CAT 2", "CAT 3"]
-        try:
-            # Intentar mantener la categoría cargada si es válida
-            idx_cat = cat_opts.index(val_cat)
-        except:
-            # Si no, calcular por defecto
-            if grado == "5to": idx_cat = 0
-            elif grado in ["3ro", "4to"]: idx_cat = 1
-            else: idx_cat = 2
-
-        categoria = st.selectbox("🏷️ Categoría", cat_opts, index=idx_cat)
-
-        # Gestión
-        gestion_opts = ["Gestión pública", "Gestión privada"]
-        idx_gestion = 1 if "privada" in str(val_gestion).lower() else 0
-        gestion = st.selectbox("🏢 Tipo de Gestión", gestion_opts, index=idx_gestion)
-        
-        # Docente
-        st.text_input("👨‍🏫 Docente Asesor (Solo lectura)", value=val_docente, disabled=True)
-
-    st.markdown("---")
-    st.markdown("#### 📝 Respuestas y Entrega")
-
-    # =========================================================
-    # ACTUALIZACIÓN DE HORARIO: 10:30 AM a 4:00 PM (minuto a minuto)
-    # =========================================================
-    horas_lista = []
+st.markdown("#### 👤 Datos Personales")
+c1, c2 = st.columns(2)
+
+with c1:
+    dni = st.text_input("🆔 DNI / Código", value=val_dni)
+    nombre = st.text_input("👤 Apellidos y Nombres", value=val_nombre)
+    institucion = st.text_input("🏫 Institución Educativa", value=val_inst)
+    ugel = st.text_input("📍 UGEL", value=val_ugel)
+
+with c2:
+    # Grado
+    grados_opts = ["1ro", "2do", "3ro", "4to", "5to"]
+    idx_grado = grados_opts.index(val_grado) if val_grado in grados_opts else 0
+    grado = st.selectbox("🎓 Grado / Año", grados_opts, index=idx_grado)
     
-    # Rango de horas: 10 a 16
-    for h in range(10, 17): 
-        for m in range(60):
-            # Restricción inicio: Nada antes de las 10:30
-            if h == 10 and m < 30:
-                continue
-            
-            # Restricción final: Nada después de las 16:00
-            if h == 16 and m > 0:
-                break
-                
-            horas_lista.append(f"{h:02d}:{m:02d}")
-
-    # Seleccionar automáticamente la hora actual si está en rango
-    idx_hora = 0
-    now = datetime.now()
-    hora_actual_str = now.strftime("%H:%M")
+    # Categoría Automática (Lógica visual para referencia)
+    # Nota: Al guardar usaremos la lógica final, aquí es para mostrar opciones correctas
+    cat_opts = ["CAT 1", "CAT 2", "CAT 3"]
+    try:
+        # Intentar mantener la categoría cargada si es válida
+        idx_cat = cat_opts.index(val_cat)
+    except:
+        # Si no, calcular por defecto
+        if grado == "5to": idx_cat = 0
+        elif grado in ["3ro", "4to"]: idx_cat = 1
+        else: idx_cat = 2
+
+    categoria = st.selectbox("🏷️ Categoría", cat_opts, index=idx_cat)
+
+    # Gestión
+    gestion_opts = ["Gestión pública", "Gestión privada"]
+    idx_gestion = 1 if "privada" in str(val_gestion).lower() else 0
+    gestion = st.selectbox("🏢 Tipo de Gestión", gestion_opts, index=idx_gestion)
     
-    if hora_actual_str in horas_lista:
-        try:
-            idx_hora = horas_lista.index(hora_actual_str)
-        except:
-            idx_hora = 0
-
-    # Grid de Respuestas Mejorado
-    c_hora, c_resp = st.columns([1, 4])
-
-    with c_hora:
-        st.markdown("<br>", unsafe_allow_html=True)
-        # Selectbox con 1 minuto de precisión
-        hora_entrega = st.selectbox("⏰ Hora de Entrega", horas_lista, index=idx_hora)
-
-    with c_resp:
-        respuestas = []
-        opciones = ["","A","B","C","D","E"]
-        
-        # Fila 1 (1-10)
-        cols_r1 = st.columns(10)
-        for i in range(1, 11):
-            with cols_r1[i-1]:
-                st.markdown(f'<div class="question-box"><span class="question-label">P{i}</span></div>', unsafe_allow_html=True)
-                resp = st.selectbox(f"P{i}", opciones, key=f"resp_{i}", label_visibility="collapsed")
-                respuestas.append(resp)
-        
-        st.write("")
-        
-        # Fila 2 (11-20)
-        cols_r2 = st.columns(10)
-        for i in range(11, 21):
-            with cols_r2[i-11]:
-                st.markdown(f'<div class="question-box"><span class="question-label">P{i}</span></div>', unsafe_allow_html=True)
-                resp = st.selectbox(f"P{i}", opciones, key=f"resp_{i}", label_visibility="collapsed")
-                respuestas.append(resp)
-
-    st.markdown("---")
-    submitted = st.form_submit_button("💾 Guardar Participante", type="primary", use_container_width=True)
-
-    if submitted:
-        if nombre == "" or dni == "":
-            st.error("⚠️ Nombre y DNI son obligatorios.")
-        else:
-            patron = utils.obtener_patron_respuestas(categoria)
-            if patron is None:
-                st.error("⚠️ Configure la clave de respuestas primero en 'Configuración'.")
-            else:
-                total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
-                
-                datos = {
-                    "alumno": {
-                        "dni": dni, "nombres": nombre, "colegio": institucion,
-                        "grado": grado, "categoria": categoria,
-                        "ugel": ugel, "gestion": gestion,
-                        "docente": val_docente
-                    },
-                    "examen": {"respuestas": respuestas},
-                    "metricas": {"total_puntos": total, "correctas": ok, "incorrectas": bad, "en_blanco": blank},
-                    "info_registro": {"hora_entrega": hora_entrega}
-                }
-                if utils.guardar_alumno(datos):
-                    st.success(f"✅ Registrado Exitosamente. Puntaje: {total}")
-                    st.balloons()
-                else:
-                    st.error("❌ Error al guardar en la base de datos.")
\ No newline at end of file
+    # Docente
+    st.text_input("👨‍🏫 Docente Asesor (Solo lectura)", value=val_docente, disabled=True)
+
+st.markdown("---")
+st.markdown("#### 📝 Respuestas y Entrega")
+
+def guardar(respuestas, hora_entrega):
+    if nombre == "" or dni == "":
+        st.error("⚠️ Nombre y DNI son obligatorios.")
+        return
+    patron = utils.obtener_patron_respuestas(categoria)
+    if patron is None:
+        st.error("⚠️ Configure la clave de respuestas primero en 'Configuración'.")
+        return
+    total, ok, bad, blank, metricas = utils.calcular_nota(respuestas, patron)
+    
+    datos = {
+        "alumno": {
+            "dni": dni, "nombres": nombre, "colegio": institucion,
+            "grado": grado, "categoria": categoria,
+            "ugel": ugel, "gestion": gestion,
+            "docente": val_docente
+        },
+        "examen": {"respuestas": respuestas},
+        "metricas": {"total_puntos": total, "correctas": ok, "incorrectas": bad, "en_blanco": blank},
+        "info_registro": {"hora_entrega": hora_entrega}
+    }
+    if utils.guardar_alumno(datos):
+        st.success(f"✅ Registrado Exitosamente. Puntaje: {total}")
+        st.balloons()
+    else:
+        st.error("❌ Error al guardar en la base de datos.")
+
+# Hoja nueva (respuestas en blanco y hora actual) cada vez que se elige otro alumno
+hoja_respuestas(f"resp_{val_dni}", categoria, guardar, hora_inicial=hora_actual_en_rango())
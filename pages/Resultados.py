@@ -1,15 +1,13 @@
 import streamlit as st
 from styles import load_styles
 import utils
+import datos_async
 import pandas as pd
-import firebase_admin
-from firebase_admin import firestore
 from urllib.parse import quote 
 
 # 1. Configuración
 load_styles()
 st.set_page_config(page_title="Resultados y Ranking", layout="wide")
-db = firestore.client()
 
 # --- CSS MODERNO PARA TARJETAS Y BOTONES ---
 st.markdown("""
@@ -71,19 +69,20 @@ st.markdown("""
 
 # 2. Cargar Datos
 try:
-    raw_data = utils.load_data() 
+    # El listener arranca sin esperar; directorio y resultados se leen en paralelo
+    utils.iniciar_escucha_resultados(espera_seg=0)
+    datos_async.precargar()
+    # Solo las columnas del ranking (sin las 20 respuestas)
+    raw_data = utils.load_data(campos=["dni", "nombre", "colegio", "grado", "categoria", "ugel", "gestion", "metricas", "info_registro"])
     participantes = raw_data.get("participants", [])
     
-    try:
-        df_directorio = utils.cargar_directorio_csv()
-        total_inscritos = len(df_directorio)
-    except:
-        df_directorio = pd.DataFrame()
-        total_inscritos = 0
+    mapa_directorio = utils.cargar_mapa_directorio()
+    total_inscritos = len(mapa_directorio)
         
 except Exception as e:
     st.error(f"Error cargando datos: {e}")
     participantes = []
+    mapa_directorio = {}
     total_inscritos = 0
 
 # Convertir a DataFrame
@@ -94,7 +93,7 @@ if participantes:
         hora_entrega = p.get("info_registro", {}).get("hora_entrega", "23:59:59")
         
         data_list.append({
-            "DNI": str(p.get("dni", "")).strip(),
+            "DNI": utils.normalizar_dni(p.get("dni", "")),
             "Estudiante": p.get("nombre"),
             "Colegio": p.get("colegio"), 
             "Grado": p.get("grado"),
@@ -110,16 +109,29 @@ if participantes:
     df_resultados = pd.DataFrame(data_list)
 
     # Cruce de Docentes
-    if not df_resultados.empty and not df_directorio.empty and 'docente' in df_directorio.columns:
-        df_directorio['dni_key'] = df_directorio['dni'].astype(str).str.strip()
-        mapa_docentes = dict(zip(df_directorio['dni_key'], df_directorio['docente']))
-        df_resultados['Docente'] = df_resultados['DNI'].map(mapa_docentes).fillna("No registrado")
-    elif not df_resultados.empty:
-        df_resultados['Docente'] = "No registrado"
+    if not df_resultados.empty:
+        df_resultados['Docente'] = [
+            mapa_directorio[d]['docente'] if d in mapa_directorio else "No registrado"
+            for d in df_resultados['DNI']
+        ]
         
 else:
     df_resultados = pd.DataFrame()
 
+# Actualización en vivo: el fragmento consulta cada pocos segundos un contador
+# en memoria y solo recarga la página cuando llegó un cambio del listener.
+st.session_state.version_ranking = utils.version_resultados()
+
+@st.fragment(run_every="5s")
+def vigilar_cambios():
+    if st.session_state.get("ranking_en_vivo", True) and utils.version_resultados() != st.session_state.version_ranking:
+        st.rerun()
+
+c_vivo, _ = st.columns([1, 3])
+with c_vivo:
+    st.toggle("🔴 Actualización en vivo", value=True, key="ranking_en_vivo", help="Redibuja el ranking automáticamente cuando se registra o corrige un examen.")
+vigilar_cambios()
+
 # 3. Métricas Generales
 col1, col2, col3, col4 = st.columns(4)
 total_evaluados = len(df_resultados)
@@ -158,11 +170,9 @@ if not df_view.empty:
     if filtro_cat != "Todos":
         df_view = df_view[df_view["Categoría"] == filtro_cat]
     
-    # Ordenamiento
-    df_view = df_view.sort_values(
-        by=["Puntaje", "Correctas", "Hora"], 
-        ascending=[False, False, True]
-    ).reset_index(drop=True)
+    # Ordenamiento: load_data ya entrega el ranking ordenado (Puntaje desc,
+    # Correctas desc, Hora asc) y los filtros conservan ese orden.
+    df_view = df_view.reset_index(drop=True)
     df_view.index += 1 
 
     cols_mostrar = ["DNI", "Estudiante", "Puntaje", "Correctas", "Incorrectas", "En Blanco", "Hora", "Grado", "Categoría", "Colegio", "Docente"]
@@ -198,14 +208,21 @@ st.markdown("""
 
 # Botón de descarga fuera del HTML para que funcione la lógica de Streamlit
 col_dl_btn, col_dl_dummy = st.columns([1, 3])
-archivo_pdf_path = None
 if not df_view.empty:
-    archivo_pdf_path = utils.generar_reporte_pdf(df_view)
+    # El PDF se genera solo a pedido y queda en cache mientras los datos y
+    # filtros no cambien (escribir en WhatsApp/correo no lo reconstruye).
+    filtros_pdf = (filtro_grado, filtro_cat)
     with col_dl_btn:
-        with open(archivo_pdf_path, "rb") as f:
+        if st.session_state.get("pdf_filtros") != filtros_pdf:
+            if st.button("📄 Preparar Reporte PDF", type="primary", use_container_width=True):
+                st.session_state.pdf_filtros = filtros_pdf
+                st.rerun()
+        else:
+            with st.spinner("Generando reporte..."):
+                pdf_bytes = utils.obtener_reporte_pdf(df_view, filtros_pdf)
             st.download_button(
                 "⬇️ Descargar Reporte PDF", 
-                f, 
+                pdf_bytes, 
                 "Ranking_Oficial_CERM.pdf", 
                 "application/pdf", 
                 type="primary", 
@@ -214,6 +231,31 @@ if not df_view.empty:
 else:
     st.warning("⚠️ No hay datos disponibles para generar el reporte.")
 
+# --- REPORTES MASIVOS: UN PDF POR COLEGIO / UGEL ---
+with st.expander("📦 Reportes por Institución o UGEL (ZIP)"):
+    st.caption("Genera una hoja de resultados por cada colegio o UGEL con todos los exámenes registrados y los descarga en un solo archivo ZIP.")
+    if not df_resultados.empty:
+        c_agrupar, c_zip = st.columns([2, 2])
+        with c_agrupar:
+            agrupar_por = st.radio("Agrupar por:", ["Colegio", "UGEL"], horizontal=True, key="zip_agrupar")
+        with c_zip:
+            if st.session_state.get("zip_solicitado") != agrupar_por:
+                if st.button("🗂️ Generar Reportes", use_container_width=True):
+                    st.session_state.zip_solicitado = agrupar_por
+                    st.rerun()
+            else:
+                with st.spinner("Generando reportes en paralelo..."):
+                    zip_bytes = utils.obtener_reportes_por_grupo(df_resultados, agrupar_por)
+                st.download_button(
+                    f"⬇️ Descargar ZIP por {agrupar_por}",
+                    zip_bytes,
+                    f"Reportes_por_{agrupar_por}_CERM.zip",
+                    "application/zip",
+                    use_container_width=True
+                )
+    else:
+        st.info("Aún no hay resultados registrados.")
+
 st.write("")
 
 # --- PASO 2 Y 3: SELECCIÓN DE CANAL Y ENVÍO ---
@@ -314,7 +356,7 @@ with st.expander("🗑️ Gestión de Resultados (Eliminar Exámenes Erróneos)"
             dni_borrar = seleccion_borrar.split(" | ")[0]
             if st.button(f"🔥 Eliminar Examen de {dni_borrar}", type="primary"):
                 try:
-                    db.collection('participantes').document(dni_borrar).delete()
+                    utils.eliminar_participante(dni_borrar)
                     st.success("✅ Examen eliminado correctamente.")
                     st.rerun()
                 except Exception as e:
@@ -0,0 +1,272 @@
+"""
+Generación de reportes PDF del concurso.
+
+Este módulo no depende de Streamlit ni de Firebase para que los procesos
+worker de los reportes masivos lo importen rápido.
+"""
+import io
+import os
+import re
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fpdf import FPDF
+
+# ==========================================
+# 1. REPORTE OFICIAL (RANKING GENERAL)
+# ==========================================
+# Los DataFrame llegan en el orden oficial del ranking (utils.load_data, que
+# sale de IndiceRanking / clave_orden): aquí no se reordena. Ordenar de nuevo
+# por la columna 'Hora' como texto ("10:45" frente a "10:45:00") podía dejar
+# el PDF distinto del ranking en pantalla.
+
+class PDF(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 10)
+        self.cell(0, 10, 'Sistema de Evaluacion CERM 2025 - Reporte Oficial', 0, 1, 'R')
+        self.ln(5)
+
+def _latin(texto):
+    return str(texto).encode('latin-1', 'replace').decode('latin-1')
+
+def _a_bytes(pdf):
+    salida = pdf.output(dest='S')
+    # fpdf 1.x devuelve str latin-1; fpdf2 devuelve bytearray
+    return salida.encode('latin-1') if isinstance(salida, str) else bytes(salida)
+
+def _construir_reporte_pdf(df_resultados):
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    
+    # REPORTE 1: TOP 20
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "TOP 20 MEJORES ALUMNOS POR CATEGORIA", ln=True, align='C')
+    pdf.ln(5)
+    
+    categorias = ["CAT 1", "CAT 2", "CAT 3"]
+    
+    for cat in categorias:
+        pdf.set_font("Arial", "B", 12)
+        pdf.set_fill_color(220, 230, 255)
+        pdf.cell(0, 10, f"CATEGORIA {cat}", ln=True, fill=True)
+        
+        if not df_resultados.empty and "Categoría" in df_resultados.columns:
+            top = df_resultados[df_resultados["Categoría"] == cat].head(20)
+            
+            # Encabezados de Tabla (Ancho Total A4 útil ~180-190)
+            pdf.set_font("Arial", "B", 9)
+            pdf.cell(10, 8, "No.", 1, align='C')
+            pdf.cell(65, 8, "Estudiante", 1)  # Reducido un poco para dar espacio a hora
+            pdf.cell(65, 8, "Colegio", 1)     # Reducido un poco para dar espacio a hora
+            pdf.cell(20, 8, "Pts", 1, align='C')
+            pdf.cell(25, 8, "Hora", 1, align='C') # NUEVA COLUMNA
+            pdf.ln()
+            
+            pdf.set_font("Arial", "", 9)
+            rank = 1
+            for _, row in top.iterrows():
+                est = str(row.get("Estudiante","")).encode('latin-1', 'replace').decode('latin-1')
+                col = str(row.get("Colegio","")).encode('latin-1', 'replace').decode('latin-1')
+                hora = str(row.get("Hora", "--:--"))
+                
+                pdf.cell(10, 6, str(rank), 1, align='C')
+                pdf.cell(65, 6, est[:35], 1) # Cortamos texto si es muy largo
+                pdf.cell(65, 6, col[:35], 1)
+                pdf.cell(20, 6, str(row.get("Puntaje",0)), 1, align='C')
+                pdf.cell(25, 6, hora, 1, align='C')
+                pdf.ln()
+                rank += 1
+        pdf.ln(5)
+        
+    # REPORTE 2: CAMPEÓN
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "RECONOCIMIENTO INSTITUCIONAL", ln=True, align='C')
+    pdf.ln(5)
+    
+    if not df_resultados.empty:
+        camp = df_resultados.groupby("Colegio")["Puntaje"].sum().reset_index()
+        camp = camp.sort_values(by="Puntaje", ascending=False)
+        
+        if not camp.empty:
+            ganador = camp.iloc[0]
+            col_ganador = str(ganador['Colegio']).encode('latin-1', 'replace').decode('latin-1')
+            
+            pdf.set_fill_color(255, 215, 0)
+            pdf.rect(10, pdf.get_y(), 190, 40, 'F')
+            pdf.set_y(pdf.get_y() + 5)
+            
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(0, 8, f"CAMPEON REGIONAL DE MATEMATICA 2025", ln=True, align='C')
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 8, "(Gallardete de Honor)", ln=True, align='C')
+            pdf.set_font("Arial", "B", 16)
+            pdf.cell(0, 10, f"{col_ganador}", ln=True, align='C')
+            pdf.set_font("Arial", "", 12)
+            pdf.cell(0, 8, f"PUNTAJE ACUMULADO: {ganador['Puntaje']} Puntos", ln=True, align='C')
+            pdf.ln(15)
+            
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(0, 10, "MENCION HONORIFICA", ln=True, align='C')
+            
+            if len(camp) > 1:
+                seg = camp.iloc[1]
+                c2 = str(seg['Colegio']).encode('latin-1', 'replace').decode('latin-1')
+                pdf.set_fill_color(220, 220, 220)
+                pdf.cell(0, 10, f"2do Puesto: {c2} ({seg['Puntaje']} pts)", ln=True, fill=True, align='C')
+            
+            if len(camp) > 2:
+                ter = camp.iloc[2]
+                c3 = str(ter['Colegio']).encode('latin-1', 'replace').decode('latin-1')
+                pdf.set_fill_color(205, 127, 50)
+                pdf.cell(0, 10, f"3er Puesto: {c3} ({ter['Puntaje']} pts)", ln=True, fill=True, align='C')
+            pdf.ln(10)
+
+    # REPORTE 3: DOCENTES
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "RECONOCIMIENTO DOCENTE", ln=True, align='C')
+    pdf.ln(5)
+    
+    pdf.set_font("Arial", "", 11)
+    txt = ("Se otorgara Resolucion Directoral Regional de reconocimiento y "
+           "felicitacion a los docentes asesores de los estudiantes que ocupen "
+           "los tres primeros puestos en cada categoria.")
+    pdf.multi_cell(0, 6, txt, 0, 'C')
+    pdf.ln(10)
+    
+    for cat in categorias:
+        pdf.set_font("Arial", "B", 12)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_fill_color(0, 51, 102)
+        pdf.cell(0, 10, f" CATEGORIA {cat}", ln=True, fill=True)
+        pdf.set_text_color(0, 0, 0)
+        
+        if not df_resultados.empty:
+            # Reutilizamos el mismo orden (ya aplicado) para los docentes
+            top3 = df_resultados[df_resultados["Categoría"] == cat].head(3)
+
+            puesto = 1
+            for _, row in top3.iterrows():
+                doc = str(row.get("Docente", "No registrado")).encode('latin-1', 'replace').decode('latin-1')
+                est = str(row.get("Estudiante", "")).encode('latin-1', 'replace').decode('latin-1')
+                col = str(row.get("Colegio", "")).encode('latin-1', 'replace').decode('latin-1')
+                
+                pdf.ln(2)
+                pdf.set_font("Arial", "B", 11)
+                pdf.set_fill_color(240, 240, 240)
+                pdf.cell(20, 8, f"{puesto} Puesto", 0, 0, fill=True)
+                pdf.set_font("Arial", "", 11)
+                pdf.cell(0, 8, f"  Alumno: {est}", 0, 1, fill=True)
+                pdf.set_text_color(0, 100, 0)
+                pdf.set_font("Arial", "B", 11)
+                pdf.cell(20, 6, "", 0)
+                pdf.cell(0, 6, f"DOCENTE ASESOR: {doc}", 0, 1)
+                pdf.set_text_color(0,0,0)
+                pdf.set_font("Arial", "I", 10)
+                pdf.cell(20, 5, "", 0)
+                pdf.cell(0, 5, f"Institucion: {col}", 0, 1)
+                pdf.ln(2)
+                pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+                puesto += 1
+        pdf.ln(5)
+
+    return pdf
+
+def generar_reporte_pdf_bytes(df_resultados):
+    """Genera el reporte directamente en memoria (sin escribir a disco)."""
+    return _a_bytes(_construir_reporte_pdf(df_resultados))
+
+def generar_reporte_pdf(df_resultados, nombre="Reporte_Oficial_CERM_2025.pdf"):
+    with open(nombre, "wb") as f:
+        f.write(generar_reporte_pdf_bytes(df_resultados))
+    return nombre
+
+# ==========================================
+# 2. REPORTES POR INSTITUCIÓN / UGEL (MASIVO)
+# ==========================================
+CATEGORIAS = ["CAT 1", "CAT 2", "CAT 3"]
+
+def _reporte_grupo_pdf(nombre_grupo, filas, columna):
+    """Hoja de resultados de un colegio o UGEL. 'filas' ya vienen ordenadas."""
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    titulo = "INSTITUCION EDUCATIVA" if columna == "Colegio" else columna.upper()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 8, f"RESULTADOS POR {titulo}", ln=True, align='C')
+    pdf.set_font("Arial", "B", 12)
+    pdf.multi_cell(0, 7, _latin(nombre_grupo), 0, 'C')
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 6, f"Estudiantes evaluados: {len(filas)}", ln=True, align='C')
+    pdf.ln(4)
+
+    for cat in CATEGORIAS:
+        filas_cat = [f for f in filas if f.get("Categoría") == cat]
+        if not filas_cat: continue
+
+        pdf.set_font("Arial", "B", 12)
+        pdf.set_fill_color(220, 230, 255)
+        pdf.cell(0, 9, f"CATEGORIA {cat}", ln=True, fill=True)
+
+        pdf.set_font("Arial", "B", 9)
+        pdf.cell(10, 8, "No.", 1, align='C')
+        pdf.cell(80, 8, "Estudiante", 1)
+        pdf.cell(20, 8, "Grado", 1, align='C')
+        pdf.cell(20, 8, "Pts", 1, align='C')
+        pdf.cell(25, 8, "Correctas", 1, align='C')
+        pdf.cell(25, 8, "Hora", 1, align='C')
+        pdf.ln()
+
+        pdf.set_font("Arial", "", 9)
+        for rank, fila in enumerate(filas_cat, start=1):
+            pdf.cell(10, 6, str(rank), 1, align='C')
+            pdf.cell(80, 6, _latin(fila.get("Estudiante", ""))[:45], 1)
+            pdf.cell(20, 6, _latin(fila.get("Grado", "")), 1, align='C')
+            pdf.cell(20, 6, str(fila.get("Puntaje", 0)), 1, align='C')
+            pdf.cell(25, 6, str(fila.get("Correctas", 0)), 1, align='C')
+            pdf.cell(25, 6, str(fila.get("Hora", "--:--")), 1, align='C')
+            pdf.ln()
+        pdf.ln(5)
+    return _a_bytes(pdf)
+
+def _trabajo_reporte_grupo(tarea):
+    nombre_grupo, filas, columna = tarea
+    return nombre_grupo, _reporte_grupo_pdf(nombre_grupo, filas, columna)
+
+def _nombre_archivo(nombre_grupo, usados):
+    base = re.sub(r"[^\w\-]+", "_", str(nombre_grupo), flags=re.UNICODE).strip("_")[:80] or "Sin_nombre"
+    nombre, n = base, 2
+    while nombre in usados:
+        nombre, n = f"{base}_{n}", n + 1
+    usados.add(nombre)
+    return f"{nombre}.pdf"
+
+def generar_reportes_por_grupo(df_resultados, columna="Colegio", max_workers=None):
+    """
+    Un PDF por cada valor de `columna` ('Colegio' o 'UGEL'), generados en
+    paralelo en un pool de procesos (FPDF es CPU-bound). Devuelve un ZIP en bytes.
+    """
+    df = df_resultados  # ya ordenado; groupby conserva el orden dentro de cada grupo
+    tareas = []
+    if not df.empty and columna in df.columns:
+        grupos = df.assign(**{columna: df[columna].fillna("Sin registro").astype(str)})
+        for nombre_grupo, grupo in grupos.groupby(columna, sort=True):
+            tareas.append((nombre_grupo, grupo.to_dict("records"), columna))
+
+    if len(tareas) <= 1:
+        resultados = [_trabajo_reporte_grupo(t) for t in tareas]
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        trozo = max(1, len(tareas) // (workers * 4))
+        # 'spawn' evita heredar hilos de gRPC/Streamlit del proceso principal
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            resultados = list(pool.map(_trabajo_reporte_grupo, tareas, chunksize=trozo))
+
+    buffer = io.BytesIO()
+    usados = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nombre_grupo, contenido in resultados:
+            zf.writestr(_nombre_archivo(nombre_grupo, usados), contenido)
+    return buffer.getvalue()
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# ==========================================
+# ENTORNO DE PRUEBAS
+# ==========================================
+# Firestore en memoria y una cola en un directorio temporal, definidos antes
+# de que alguna prueba importe utils (la cola y el cliente se crean al usarse).
+_TEMPORAL = tempfile.mkdtemp(prefix="cerm_pruebas_")
+os.environ["CERM_FIRESTORE"] = "memoria"
+os.environ["CERM_COLA_DB"] = os.path.join(_TEMPORAL, "cola_registros.db")
+os.environ.pop("CERM_ALMACEN", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
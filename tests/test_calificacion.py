@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import utils
+import datos_sinteticos
+
+def _nota_referencia(respuestas, clave):
+    """Reglas oficiales escritas a mano: +5 correcta, -2 incorrecta, 0 blanco, mínimo 0."""
+    ok = bad = blank = 0
+    for r, c in zip(utils.leer_respuestas(respuestas), clave):
+        if not r: blank += 1
+        elif r == c: ok += 1
+        else: bad += 1
+    return max(0, 5 * ok - 2 * bad), ok, bad, blank
+
+@pytest.fixture(scope="module")
+def concurso():
+    claves = datos_sinteticos.generar_claves(semilla=3)
+    directorio = datos_sinteticos.generar_directorio(600, semilla=3)
+    hojas = datos_sinteticos.generar_hojas(directorio, claves, semilla=3)
+    return directorio, hojas, claves
+
+def test_lote_igual_a_calcular_nota(concurso):
+    directorio, hojas, claves = concurso
+    for cat, clave in claves.items():
+        dnis = [d for d in hojas if directorio[d]["categoria"] == cat]
+        matriz = utils.construir_matriz_respuestas([hojas[d][0] for d in dnis])
+        puntajes, correctas, incorrectas, en_blanco = utils.calcular_notas_lote(matriz, clave)
+        for i, dni in enumerate(dnis):
+            esperado = _nota_referencia(hojas[dni][0], clave)
+            assert utils.calcular_nota(hojas[dni][0], clave)[:4] == esperado
+            assert (int(puntajes[i]), int(correctas[i]), int(incorrectas[i]), int(en_blanco[i])) == esperado
+
+def test_lote_acepta_formatos_mezclados():
+    clave = list("ABCDEABCDEABCDEABCDE")
+    hojas = [
+        "ABCDE_____ABCDE_____",                                   # texto compacto
+        ["A", "", "C", "E"] + [""] * 16,                           # lista
+        {str(i): "B" for i in range(1, 21)},                       # dict legado
+        None,                                                      # sin respuestas
+    ]
+    puntajes, correctas, incorrectas, en_blanco = utils.calcular_notas_lote(utils.construir_matriz_respuestas(hojas), clave)
+    for i, hoja in enumerate(hojas):
+        assert (int(puntajes[i]), int(correctas[i]), int(incorrectas[i]), int(en_blanco[i])) == _nota_referencia(hoja, clave)
+
+def test_puntaje_nunca_negativo():
+    clave = ["A"] * 20
+    total, ok, bad, blank, _ = utils.calcular_nota(["B"] * 20, clave)
+    assert (total, ok, bad, blank) == (0, 0, 20, 0)
+
+@pytest.mark.parametrize("compacto", ["ABCDEABCDEABCDEABCDE", "____________________", "A_B_C_D_E_A_B_C_D_E_", "EDCBA_____EDCBA_____"])
+def test_ida_y_vuelta_texto_compacto(compacto):
+    lista = utils.leer_respuestas(compacto)
+    assert len(lista) == utils.NUM_PREGUNTAS
+    assert utils.compactar_respuestas(lista) == compacto
+    assert np.array_equal(utils.codificar_respuestas(compacto), utils.codificar_respuestas(lista))
+
+def test_leer_respuestas_formatos_legados():
+    lista = ["A", "", "C"] + [""] * 17
+    legado = {"1": "A", "3": "C"}
+    assert utils.leer_respuestas(legado) == lista
+    assert utils.leer_respuestas(["A", None, "C"]) == lista
+    assert utils.leer_respuestas(utils.compactar_respuestas(legado)) == lista
+
+def test_codificar_respuestas_invalidas():
+    fila = utils.codificar_respuestas(["Z"] + [""] * 19)
+    assert fila[0] != 0 and fila[0] not in range(1, 6)   # ni blanco ni una opción
+    assert utils.codificar_respuestas(["Z"] + [""] * 19, es_clave=True)[0] == 0
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+import cola_registros
+from cola_registros import ColaRegistros
+
+class EnvioFalso:
+    """enviar_lote que anota lo recibido; 'demora' deja ventanas para carreras."""
+    def __init__(self, demora=0.0, fallar=0):
+        self.recibidos = []
+        self.demora = demora
+        self.fallar = fallar
+        self.lock = threading.Lock()
+
+    def __call__(self, lote):
+        time.sleep(self.demora)
+        if self.fallar:
+            self.fallar -= 1
+            raise ConnectionError("sin red")
+        with self.lock:
+            self.recibidos.extend(lote)
+
+@pytest.fixture
+def ruta(tmp_path):
+    return str(tmp_path / "cola.db")
+
+def test_ultima_version_por_documento(ruta):
+    envio = EnvioFalso()
+    cola = ColaRegistros(ruta, envio)
+    cola.poner("1", {"v": 1})
+    cola.poner("2", {"v": 1})
+    cola.poner("1", {"v": 2})
+    cola.poner("2", None)
+    assert cola.pendientes() == {"1": {"v": 2}, "2": None}
+    while cola.vaciar_una_vez(): pass
+    assert envio.recibidos == [("participantes", "1", {"v": 2}), ("participantes", "2", None)]
+    assert cola.profundidad() == 0
+
+def test_vaciado_concurrente_en_orden_y_sin_duplicados(ruta, monkeypatch):
+    monkeypatch.setattr(cola_registros, "MAX_LOTE", 40)
+    envio = EnvioFalso(demora=0.005)
+    cola = ColaRegistros(ruta, envio)
+    for version in range(10):
+        for dni in range(30):
+            cola.poner(str(dni), {"v": version})
+
+    def vaciar():
+        while cola.vaciar_una_vez(): pass
+    hilos = [threading.Thread(target=vaciar) for _ in range(4)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+
+    assert cola.profundidad() == 0
+    versiones = {}
+    for _, dni, registro in envio.recibidos:
+        versiones.setdefault(dni, []).append(registro["v"])
+    for dni, vistas in versiones.items():
+        assert vistas == sorted(set(vistas)), f"DNI {dni}: versiones fuera de orden o repetidas {vistas}"
+        assert vistas[-1] == 9
+
+def test_fallo_conserva_pendientes(ruta):
+    envio = EnvioFalso(fallar=1)
+    cola = ColaRegistros(ruta, envio)
+    cola.poner("1", {"v": 1})
+    with pytest.raises(ConnectionError):
+        cola.vaciar_una_vez()
+    assert cola.profundidad() == 1
+    assert cola.vaciar_una_vez() == 1
+    assert envio.recibidos == [("participantes", "1", {"v": 1})]
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+import utils
+import datos_sinteticos
+
+@pytest.fixture(scope="module")
+def concurso():
+    # Padrón y claves en el Firestore en memoria del proceso (utils.db)
+    directorio, hojas, claves = datos_sinteticos.poblar(utils.db, 40, semilla=9)
+    utils.invalidar_directorio()   # que se lean el padrón y la clave recién poblados
+    utils.invalidar_configuracion()
+    return directorio, claves
+
+def _estado(concurso, respuestas, hora):
+    directorio, _ = concurso
+    dni = next(iter(directorio))
+    _, reporte = utils.preparar_importacion(pd.DataFrame({"DNI": [dni], "Hora": [hora], "Respuestas": [respuestas]}))
+    return reporte.iloc[0]["Estado"], reporte.iloc[0]["Detalle"]
+
+def test_hoja_valida(concurso):
+    assert _estado(concurso, "ABCDE_____ABCDE_____", "10:45")[0] in ("Nuevo", "Actualiza")
+    assert _estado(concurso, "ABCDE_____ABCDE_____", "16:00:00")[0] in ("Nuevo", "Actualiza")
+
+@pytest.mark.parametrize("respuestas", ["ABCDE_____ABCDE____", "ABCDE_____ABCDE______"])
+def test_largo_distinto_de_20_es_error(concurso, respuestas):
+    estado, detalle = _estado(concurso, respuestas, "11:00")
+    assert estado == "Error" and "20" in detalle
+
+@pytest.mark.parametrize("hora, detalle", [("99:99", "inválida"), ("10:75", "inválida"),
+                                           ("23:59", "fuera del horario"), ("10:29:59", "fuera del horario"),
+                                           ("16:00:01", "fuera del horario")])
+def test_hora_fuera_de_rango_es_error(concurso, hora, detalle):
+    estado, texto = _estado(concurso, "ABCDE_____ABCDE_____", hora)
+    assert estado == "Error" and detalle in texto
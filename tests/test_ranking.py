@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+import utils
+import datos_sinteticos
+from firestore_memoria import ClienteMemoria
+from almacenamiento import AlmacenFirestore
+
+def _orden_referencia(participantes):
+    """Orden oficial con sort simple: puntaje, correctas, hora más temprana, DNI."""
+    def clave(dni):
+        p = participantes[dni]
+        h, m, s = (p["info_registro"]["hora_entrega"].split(":") + ["0"])[:3]
+        return (-p["metricas"]["total_puntos"], -p["metricas"]["correctas"], int(h) * 3600 + int(m) * 60 + int(s), dni)
+    return sorted(participantes, key=clave)
+
+def _participante(dni, puntos, correctas, hora, categoria="CAT 1", grado="5to"):
+    return {"dni": dni, "categoria": categoria, "grado": grado,
+            "metricas": {"total_puntos": puntos, "correctas": correctas},
+            "info_registro": {"hora_entrega": hora}}
+
+@pytest.fixture(scope="module")
+def poblado():
+    db = ClienteMemoria()
+    datos_sinteticos.poblar(db, 2000, semilla=5)
+    participantes = {doc.id: doc.to_dict() for doc in db.collection('participantes').stream()}
+    return db, participantes
+
+def test_indice_igual_a_sort(poblado):
+    _, participantes = poblado
+    indice = utils.IndiceRanking()
+    indice.reconstruir(participantes)
+    assert indice.pagina() == _orden_referencia(participantes)
+    for cat in ("CAT 1", "CAT 2", "CAT 3"):
+        grupo = {d: p for d, p in participantes.items() if p["categoria"] == cat}
+        assert indice.pagina(categoria=cat) == _orden_referencia(grupo)
+
+def test_indice_incremental_igual_a_reconstruir(poblado):
+    _, participantes = poblado
+    azar = random.Random(7)
+    incremental = utils.IndiceRanking()
+    for dni in azar.sample(list(participantes), len(participantes)):
+        incremental.actualizar(dni, participantes[dni])
+    quitados = azar.sample(list(participantes), 100)
+    for dni in quitados:
+        incremental.eliminar(dni)
+    restantes = {d: p for d, p in participantes.items() if d not in quitados}
+    assert incremental.pagina() == _orden_referencia(restantes)
+    dni = _orden_referencia(restantes)[10]
+    assert incremental.posicion(dni) == 11
+
+def test_desempates():
+    participantes = {p["dni"]: p for p in [
+        _participante("40", 50, 10, "11:00:00"),
+        _participante("30", 50, 11, "12:00:00"),   # más correctas gana
+        _participante("20", 50, 10, "10:45"),      # más temprano gana (HH:MM)
+        _participante("10", 50, 10, "11:00"),      # misma hora que "40" en segundos: DNI
+        _participante("50", 60, 0, "15:59:59"),
+    ]}
+    indice = utils.IndiceRanking()
+    indice.reconstruir(participantes)
+    assert indice.pagina() == ["50", "30", "20", "10", "40"] == _orden_referencia(participantes)
+
+def test_grupos_sin_categoria_no_repiten():
+    indice = utils.IndiceRanking()
+    indice.actualizar("1", _participante("1", 10, 2, "11:00", categoria=None, grado=None))
+    assert indice.pagina() == ["1"]
+    assert indice.posicion("1") == 1
+
+def test_consulta_paginada_igual_al_indice(poblado):
+    db, participantes = poblado
+    almacen = AlmacenFirestore(db)
+    indice = utils.IndiceRanking()
+    indice.reconstruir(participantes)
+    for cat in ("CAT 1", "CAT 3"):
+        filas, cursor = [], None
+        while True:
+            pagina, cursor = almacen.consultar_ranking(categoria=cat, tamano=97, despues_de=cursor)
+            filas += [f["dni"] for f in pagina]
+            if cursor is None: break
+        assert filas == indice.pagina(categoria=cat)
+
+def test_memoria_desempata_como_firestore():
+    db = ClienteMemoria()
+    for dni in ("1", "2", "3"):
+        db.collection('participantes').document(dni).set({"clave_orden": 7})
+    desc = db.collection('participantes').order_by('clave_orden', direction="DESCENDING")
+    assert [d.id for d in desc.stream()] == ["3", "2", "1"]   # id en el sentido del último order_by
+    assert [d.id for d in desc.order_by('__name__').stream()] == ["1", "2", "3"]
+
+def test_empates_en_el_borde_de_pagina():
+    db = ClienteMemoria()
+    participantes = {}
+    for n in range(12):
+        # Diez empatados (misma hora al minuto) y dos por encima
+        dni = str(70000000 + n * 7919 % 97)
+        puntos = 80 if n < 2 else 50
+        participantes[dni] = _participante(dni, puntos, 10, "11:00")
+        participantes[dni]["clave_orden"] = utils.clave_orden(participantes[dni])
+        db.collection('participantes').document(dni).set(participantes[dni])
+    almacen = AlmacenFirestore(db)
+    filas, cursor = [], None
+    while True:
+        pagina, cursor = almacen.consultar_ranking(tamano=4, despues_de=cursor)
+        filas += [f["dni"] for f in pagina]
+        if cursor is None: break
+    indice = utils.IndiceRanking()
+    indice.reconstruir(participantes)
+    assert filas == indice.pagina() == _orden_referencia(participantes)
@@ -1,47 +1,183 @@
+import time
+_INICIO_IMPORTACION = time.perf_counter()
 import streamlit as st
-import pandas as pd
+import numpy as np
 import json
 import os
-from fpdf import FPDF
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
+import bisect
+import heapq
+import re
+import unicodedata
+import functools
+import hashlib
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 import pytz
+from cola_registros import ColaRegistros
+from almacenamiento import AlmacenFirestore, AlmacenSQLite, DOC_CONFIGURACION
 
 # ==============================================================================
-# 0. CONEXIÓN A FIREBASE
+# 0. CONEXIÓN A FIREBASE Y ALMACÉN PRINCIPAL
 # ==============================================================================
-if not firebase_admin._apps:
+# CERM_ALMACEN=sqlite usa un archivo local (CERM_SQLITE, por defecto cerm_local.db)
+# como almacén principal y replica a Firestore cuando hay conexión; así la sede
+# puede seguir digitando aunque se caiga la red. Por defecto todo va a Firestore.
+MODO_ALMACEN = os.environ.get("CERM_ALMACEN", "firestore")
+RUTA_SQLITE = os.environ.get("CERM_SQLITE", "cerm_local.db")
+
+# La conexión se abre recién en el primer uso (obtener_db), no al importar
+# utils: las páginas arrancan sin cargar el SDK de Firebase ni abrir el canal
+# gRPC. pandas y fpdf también se importan dentro de las funciones que los usan.
+_conexion = {"error": None}
+TIEMPOS_ARRANQUE = OrderedDict()
+DEPURAR_ARRANQUE = os.environ.get("CERM_DEBUG_ARRANQUE") == "1"
+
+def registrar_arranque(etapa, segundos):
+    """
+    Anota una etapa del arranque del servidor (solo la primera vez). Con
+    CERM_DEBUG_ARRANQUE=1 también la imprime en la consola.
+    """
+    if etapa not in TIEMPOS_ARRANQUE:
+        TIEMPOS_ARRANQUE[etapa] = segundos
+        if DEPURAR_ARRANQUE:
+            print(f"Arranque: {etapa} en {1000 * segundos:.0f} ms")
+
+@st.cache_resource
+def _cliente_firestore():
+    inicio = time.perf_counter()
+    if os.environ.get("CERM_FIRESTORE") == "memoria":
+        # Firestore en memoria (benchmarks y pruebas sin credenciales ni red)
+        from firestore_memoria import ClienteMemoria
+        cliente = ClienteMemoria()
+    elif os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        # Emulador local de Firestore (pruebas): no requiere credenciales
+        from google.cloud import firestore as gcloud_firestore
+        cliente = gcloud_firestore.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT", "cerm-2025"))
+    else:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps:
+            # Híbrido: Busca archivo local O secretos de la nube
+            if os.path.exists("serviceAccountKey.json"):
+                cred = credentials.Certificate("serviceAccountKey.json")
+            else:
+                key_dict = dict(st.secrets["firebase"])
+                cred = credentials.Certificate(key_dict)
+            firebase_admin.initialize_app(cred)
+        cliente = firestore.client()
+    registrar_arranque("Conexión a Firestore", time.perf_counter() - inicio)
+    return cliente
+
+def obtener_db():
+    """Cliente de Firestore compartido por el proceso; None si no se pudo conectar."""
     try:
-        # Híbrido: Busca archivo local O secretos de la nube
-        if os.path.exists("serviceAccountKey.json"):
-            cred = credentials.Certificate("serviceAccountKey.json")
-        else:
-            key_dict = dict(st.secrets["firebase"])
-            cred = credentials.Certificate(key_dict)
-            
-        firebase_admin.initialize_app(cred)
+        cliente = _cliente_firestore()
+        _conexion["error"] = None
+        return cliente
     except Exception as e:
-        st.error(f"❌ Error conectando a Firebase: {e}")
-        st.stop()
+        # No queda en cache: el próximo uso vuelve a intentar
+        if _conexion["error"] is None:
+            print(f"Aviso: sin conexión a Firebase: {e}")
+        _conexion["error"] = str(e)
+        return None
+
+def _marca_servidor():
+    """
+    firestore.SERVER_TIMESTAMP, importando el SDK recién cuando se escribe. En
+    modo local basta la hora actual: el almacén y la cola ponen su propia marca.
+    """
+    if es_local(): return datetime.now(pytz.utc)
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
+def __getattr__(nombre):
+    # utils.db y los generadores de PDF se resuelven al primer acceso
+    if nombre == "db":
+        return obtener_db()
+    if nombre in ("generar_reporte_pdf", "generar_reporte_pdf_bytes", "generar_reportes_por_grupo"):
+        import reportes
+        return getattr(reportes, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+def es_local():
+    return MODO_ALMACEN == "sqlite"
 
-db = firestore.client()
+def _remoto():
+    """Firestore como almacén (principal o réplica); None si no hay conexión."""
+    cliente = obtener_db()
+    return AlmacenFirestore(cliente) if cliente is not None else None
+
+@st.cache_resource
+def almacen_datos():
+    """Almacén principal (ver almacenamiento.py). Un SQLite vacío se llena desde la nube."""
+    if es_local():
+        local = AlmacenSQLite(RUTA_SQLITE)
+        if local.vacio() and obtener_db() is not None:
+            try: _copiar_desde_nube(local)
+            except Exception as e: print(f"Aviso: no se pudo copiar la nube al almacén local: {e}")
+        return local
+    cliente = obtener_db()
+    if cliente is None:
+        st.error(f"❌ Error conectando a Firebase: {_conexion['error']}")
+        st.stop()
+    return AlmacenFirestore(cliente)
 
 # ==========================================
 # 1. GESTIÓN DE CONFIGURACIÓN (CLAVES)
 # ==========================================
-def cargar_configuracion():
+# La clave oficial se guarda en memoria del proceso (compartida por todas las
+# sesiones). Se invalida al guardar y, si es posible, un listener de Firestore
+# la mantiene al día cuando otro servidor la modifica.
+CLAVES_POR_DEFECTO = {"CAT 1": [""]*20, "CAT 2": [""]*20, "CAT 3": [""]*20}
+_cache_claves = {"config": None, "escuchando": False}
+_lock_claves = threading.Lock()
+
+def _doc_configuracion():
+    return obtener_db().collection('configuracion').document(DOC_CONFIGURACION)
+
+def _al_cambiar_configuracion(snapshots, cambios, momento):
+    for doc in snapshots:
+        if doc.exists:
+            with _lock_claves:
+                _cache_claves["config"] = doc.to_dict()
+
+def _escuchar_configuracion():
+    if _cache_claves["escuchando"] or es_local(): return
     try:
-        doc = db.collection('configuracion').document('respuestas_oficiales').get()
-        if doc.exists: return doc.to_dict()
-    except: pass
-    return {"CAT 1": [""]*20, "CAT 2": [""]*20, "CAT 3": [""]*20}
+        _doc_configuracion().on_snapshot(_al_cambiar_configuracion)
+        _cache_claves["escuchando"] = True
+    except Exception as e:
+        print(f"Aviso: no se pudo escuchar la configuración: {e}")
+
+def invalidar_configuracion():
+    with _lock_claves:
+        _cache_claves["config"] = None
+
+def cargar_configuracion():
+    with _lock_claves:
+        config = _cache_claves["config"]
+    if config is None:
+        try:
+            config = almacen_datos().leer_configuracion() or dict(CLAVES_POR_DEFECTO)
+            with _lock_claves:
+                _cache_claves["config"] = config
+            _escuchar_configuracion()
+        except: return dict(CLAVES_POR_DEFECTO)
+    # Copia para que quien la modifique no altere el cache
+    return {k: (list(v) if isinstance(v, list) else v) for k, v in config.items()}
 
 def guardar_categoria_individual(categoria, nuevas_claves):
     try:
         config_actual = cargar_configuracion()
         config_actual[categoria] = nuevas_claves
-        db.collection('configuracion').document('respuestas_oficiales').set(config_actual)
+        config_actual["version"] = int(config_actual.get("version", 0)) + 1
+        config_actual["actualizado"] = datetime.now(pytz.utc)
+        almacen_datos().guardar_configuracion(config_actual)
+        _replicar('configuracion', DOC_CONFIGURACION, config_actual)
+        with _lock_claves:
+            _cache_claves["config"] = config_actual
         
         # Historial
         zona_peru = pytz.timezone('America/Lima')
@@ -50,18 +186,21 @@ def guardar_categoria_individual(categoria, nuevas_claves):
             "timestamp": datetime.now(),
             "categoria": categoria,
             "accion": "Actualización de Clave",
-            "claves_guardadas": nuevas_claves
+            "claves_guardadas": nuevas_claves,
+            "version": config_actual["version"]
         }
-        db.collection('historial_cambios').add(evento)
+        doc_id = uuid.uuid4().hex
+        almacen_datos().agregar_historial(evento, doc_id)
+        _replicar('historial_cambios', doc_id, evento)
         return True
     except Exception as e:
         print(f"Error: {e}")
+        invalidar_configuracion()
         return False
 
 def obtener_historial():
     try:
-        docs = db.collection('historial_cambios').order_by('timestamp', direction=firestore.Query.DESCENDING).limit(50).stream()
-        return [doc.to_dict() for doc in docs]
+        return almacen_datos().leer_historial(50)
     except: return []
 
 def obtener_patron_respuestas(categoria):
@@ -69,54 +208,442 @@ def obtener_patron_respuestas(categoria):
     return cfg.get(categoria, None)
 
 # ==========================================
-# 2. CARGAR DIRECTORIO
+# 2. ALMACÉN COMPARTIDO Y DIRECTORIO
 # ==========================================
-@st.cache_data(ttl=600)
+def _segundos_hora(hora):
+    try:
+        partes = [int(x) for x in str(hora).split(":")[:3]]
+    except ValueError:
+        return 86399
+    partes += [0] * (3 - len(partes))
+    return min(partes[0] * 3600 + partes[1] * 60 + partes[2], 86399)
+
+# Horario de entrega de hojas (inclusive): lo usan los formularios, el
+# registro rápido y la importación masiva
+HORARIO_ENTREGA = ("10:30", "16:00")
+
+def en_horario_entrega(hora):
+    """True si la hora (HH:MM o HH:MM:SS, ya validada) cae dentro de HORARIO_ENTREGA."""
+    inicio, fin = (_segundos_hora(h) for h in HORARIO_ENTREGA)
+    return inicio <= _segundos_hora(hora) <= fin
+
+def clave_orden(participante):
+    """
+    Criterio de orden oficial empaquetado en un solo entero (mayor = mejor):
+    1. Puntaje (mayor a menor)  2. Correctas (mayor a menor)
+    3. Hora en segundos (más temprano gana).
+    Se guarda en el documento ('clave_orden') para ordenar en Firestore con
+    order_by(..., DESCENDING) y luego '__name__' (DNI), y en SQLite con
+    ORDER BY clave_orden DESC, dni.
+    """
+    metricas = participante.get("metricas") or {}
+    info = participante.get("info_registro") or {}
+    hora = info.get("hora_entrega", "23:59:59") if isinstance(info, dict) else "23:59:59"
+    puntaje = int(metricas.get("total_puntos", 0) or 0) + 1000  # admite puntajes legados negativos
+    correctas = int(metricas.get("correctas", 0) or 0)
+    return (puntaje * 100 + correctas) * 100000 + (99999 - _segundos_hora(hora))
+
+def clave_ranking(participante):
+    """
+    Misma clave que clave_orden, como tupla ascendente para el índice en
+    memoria; el DNI desempata igual que en la consulta paginada.
+    """
+    return (-clave_orden(participante), str(participante.get("dni", "")).strip())
+
+class IndiceRanking:
+    """
+    Ranking siempre ordenado, mantenido por inserciones con bisect en vez de
+    reordenar todo en cada recarga. Hay una lista por grupo: general, por
+    categoría, por grado y por categoría+grado.
+    """
+    def __init__(self):
+        self._listas = {}   # grupo -> lista ordenada de (clave, dni)
+        self._entradas = {} # dni -> (clave, grupos)
+
+    @staticmethod
+    def _grupos(participante):
+        cat, grado = participante.get("categoria"), participante.get("grado")
+        # Sin categoría o grado, varios grupos coinciden con el general: sin repetir
+        return list(dict.fromkeys([(None, None), (cat, None), (None, grado), (cat, grado)]))
+
+    def actualizar(self, dni, participante):
+        self.eliminar(dni)
+        entrada = (clave_ranking(participante), dni)
+        grupos = self._grupos(participante)
+        for g in grupos:
+            bisect.insort(self._listas.setdefault(g, []), entrada)
+        self._entradas[dni] = (entrada, grupos)
+
+    def eliminar(self, dni):
+        previa = self._entradas.pop(dni, None)
+        if previa is None: return
+        entrada, grupos = previa
+        for g in grupos:
+            lista = self._listas[g]
+            i = bisect.bisect_left(lista, entrada)
+            if i < len(lista) and lista[i] == entrada: del lista[i]
+
+    def reconstruir(self, participantes):
+        self._listas, self._entradas = {}, {}
+        entradas = sorted((clave_ranking(p), dni) for dni, p in participantes.items())
+        for entrada in entradas:
+            grupos = self._grupos(participantes[entrada[1]])
+            for g in grupos:
+                self._listas.setdefault(g, []).append(entrada)
+            self._entradas[entrada[1]] = (entrada, grupos)
+
+    def pagina(self, inicio=0, cantidad=None, categoria=None, grado=None):
+        lista = self._listas.get((categoria, grado), [])
+        fin = None if cantidad is None else inicio + cantidad
+        return [dni for _, dni in lista[inicio:fin]]
+
+    def top(self, k, categoria=None, grado=None):
+        return self.pagina(0, k, categoria, grado)
+
+    def posicion(self, dni, categoria=None, grado=None):
+        """Puesto (1 = primero) del DNI dentro del grupo, o None si no está."""
+        previa = self._entradas.get(dni)
+        if previa is None: return None
+        lista = self._listas.get((categoria, grado), [])
+        i = bisect.bisect_left(lista, previa[0])
+        return i + 1 if i < len(lista) and lista[i] == previa[0] else None
+
+class AlmacenCompartido:
+    """
+    Datos compartidos por todas las sesiones del servidor: participantes y
+    directorio. Las escrituras de la app lo actualizan al instante
+    (write-through) y la invalidación es explícita por DNI, sin TTL.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        # Resultados: dni -> documento de 'participantes'
+        self.participantes = {}
+        self.cursor = None
+        self.ultima_completa = 0.0
+        self.version_resultados = 0
+        self.escucha = None                   # listener de Firestore (on_snapshot)
+        self.escucha_lista = threading.Event()  # primer snapshot recibido
+        self.indice = IndiceRanking()
+        # Directorio: dni -> documento de 'directorio_alumnos' (None = sin cargar)
+        self.directorio = None
+        self.directorio_pendientes = set()
+        self.version_directorio = 0
+        self.derivados_directorio = {}  # nombre -> (versión, estructura)
+
+    # Toda modificación de participantes pasa por aquí para mantener el índice
+    def poner_participante(self, dni, participante):
+        with self.lock:
+            self.participantes[dni] = participante
+            self.indice.actualizar(dni, participante)
+            self.version_resultados += 1
+
+    def quitar_participante(self, dni):
+        with self.lock:
+            self.participantes.pop(dni, None)
+            self.indice.eliminar(dni)
+            self.version_resultados += 1
+
+    def reemplazar_participantes(self, participantes):
+        with self.lock:
+            self.participantes = participantes
+            self.indice.reconstruir(participantes)
+            self.version_resultados += 1
+
+    def participantes_ordenados(self):
+        with self.lock:
+            return [self.participantes[dni] for dni in self.indice.pagina()]
+
+@st.cache_resource
+def obtener_almacen():
+    return AlmacenCompartido()
+
+def invalidar_directorio(dni=None):
+    """Sin DNI recarga todo el padrón; con DNI solo vuelve a leer ese alumno."""
+    alm = obtener_almacen()
+    with alm.lock:
+        if dni is None: alm.directorio = None
+        else: alm.directorio_pendientes.add(str(dni).strip())
+
+def _sincronizar_directorio(alm):
+    if alm.directorio is None:
+        alm.directorio = almacen_datos().leer_directorio()
+        alm.directorio_pendientes.clear()
+        alm.version_directorio += 1
+    elif alm.directorio_pendientes:
+        leidos = almacen_datos().leer_directorio(alm.directorio_pendientes)
+        for dni in alm.directorio_pendientes:
+            if dni in leidos: alm.directorio[dni] = leidos[dni]
+            else: alm.directorio.pop(dni, None)
+        alm.directorio_pendientes.clear()
+        alm.version_directorio += 1
+
+def _derivado_directorio(nombre, construir):
+    """
+    Estructuras derivadas del padrón (DataFrame, índices) construidas una sola
+    vez por versión del directorio y compartidas entre sesiones.
+    """
+    alm = obtener_almacen()
+    with alm.lock:
+        _sincronizar_directorio(alm)
+        version, valor = alm.derivados_directorio.get(nombre, (None, None))
+        if version != alm.version_directorio:
+            valor = construir(alm.directorio)
+            alm.derivados_directorio[nombre] = (alm.version_directorio, valor)
+        return valor
+
+def _construir_df_directorio(directorio):
+    import pandas as pd
+    df = pd.DataFrame(list(directorio.values()))
+    if 'colegio' in df.columns and 'institucion' not in df.columns:
+        df.rename(columns={'colegio': 'institucion'}, inplace=True)
+    return df
+
 def cargar_directorio_csv():
     try:
-        docs = db.collection('directorio_alumnos').stream()
-        lista = [doc.to_dict() for doc in docs]
-        if not lista: return pd.DataFrame()
-        
-        df = pd.DataFrame(lista)
-        if 'colegio' in df.columns and 'institucion' not in df.columns:
-            df.rename(columns={'colegio': 'institucion'}, inplace=True)
-        return df
-    except: return pd.DataFrame()
+        df = _derivado_directorio("df", _construir_df_directorio)
+    except:
+        import pandas as pd
+        return pd.DataFrame()
+    # Copia: las páginas agregan columnas auxiliares al DataFrame
+    return df.copy()
+
+def normalizar_dni(valor):
+    """DNI canónico como texto: 71611170.0 / ' 71611170 ' -> '71611170'."""
+    if valor is None: return ""
+    if isinstance(valor, float):
+        if valor != valor: return ""  # NaN
+        if valor.is_integer(): valor = int(valor)
+    dni = str(valor).strip().replace(" ", "")
+    return dni[:-2] if dni.endswith(".0") else dni
+
+def _texto_o(valor, defecto=""):
+    texto = "" if valor is None else str(valor).strip()
+    return defecto if texto in ("", "nan", "None") else texto
+
+def _construir_mapa_directorio(directorio):
+    mapa = {}
+    for id_doc, reg in directorio.items():
+        dni = normalizar_dni(reg.get("dni", id_doc)) or id_doc
+        mapa[dni] = {
+            "dni": dni,
+            "nombre_completo": _texto_o(reg.get("nombre_completo")),
+            "institucion": _texto_o(reg.get("institucion", reg.get("colegio"))),
+            "ugel": _texto_o(reg.get("ugel")),
+            "gestion": _texto_o(reg.get("gestion")),
+            "grado": _texto_o(reg.get("grado")),
+            "categoria": _texto_o(reg.get("categoria")),
+            "docente": _texto_o(reg.get("docente"), "No registrado"),
+        }
+    return mapa
+
+def cargar_mapa_directorio():
+    """Padrón indexado por DNI canónico -> registro compacto (solo lectura)."""
+    try:
+        return _derivado_directorio("mapa", _construir_mapa_directorio)
+    except: return {}
+
+# ==========================================
+# 2.1 BÚSQUEDA DE ESTUDIANTES (ÍNDICE)
+# ==========================================
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes: 'Ñahui Pérez' -> 'nahui perez'."""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+def _tokens(texto):
+    return [t for t in re.split(r"\W+", normalizar_texto(texto)) if t]
+
+def _rango_prefijo(lista_ordenada, prefijo):
+    inicio = bisect.bisect_left(lista_ordenada, prefijo)
+    fin = bisect.bisect_left(lista_ordenada, prefijo + "\uffff")
+    return inicio, fin
+
+class IndiceBusqueda:
+    """
+    Índice del padrón para el buscador: prefijos de DNI (lista ordenada +
+    bisect, equivalente a un trie) y palabras sin tildes de nombre_completo e
+    institución (vocabulario ordenado -> alumnos).
+    """
+    def __init__(self, directorio):
+        self.filas = []
+        self.dnis = []
+        palabras = {}
+        for id_doc, reg in directorio.items():
+            i = len(self.filas)
+            dni = normalizar_dni(reg.get("dni", id_doc)) or id_doc
+            nombre = str(reg.get("nombre_completo", "") or "")
+            inst = str(reg.get("institucion", reg.get("colegio", "")) or "")
+            self.filas.append((dni, nombre, inst))
+            self.dnis.append((dni, i))
+            for t in set(_tokens(nombre) + _tokens(inst)):
+                palabras.setdefault(t, []).append(i)
+        self.dnis.sort()
+        self.vocabulario = sorted(palabras)
+        self.postings = [palabras[t] for t in self.vocabulario]
+        self.claves_dni = [d for d, _ in self.dnis]
+
+    def _por_dni(self, prefijo):
+        inicio, fin = _rango_prefijo(self.claves_dni, prefijo)
+        return [i for _, i in self.dnis[inicio:fin]]
+
+    def _por_palabra(self, prefijo):
+        inicio, fin = _rango_prefijo(self.vocabulario, prefijo)
+        ids = set()
+        for lista in self.postings[inicio:fin]:
+            ids.update(lista)
+        return ids
+
+    def buscar(self, texto, limite=20):
+        """Hasta `limite` alumnos (dni, nombre, institución) que coinciden con el texto."""
+        texto = str(texto or "").strip()
+        if not texto: return []
+
+        resultados = []
+        if texto.isdigit():
+            resultados = [self.filas[i] for i in self._por_dni(texto)[:limite]]
+            if len(resultados) >= limite: return resultados
+
+        ids = None
+        for t in _tokens(texto):
+            coincidencias = self._por_palabra(t)
+            ids = coincidencias if ids is None else ids & coincidencias
+            if not ids: break
+        if ids:
+            vistos = {fila[0] for fila in resultados}
+            candidatos = (self.filas[i] for i in ids if self.filas[i][0] not in vistos)
+            resultados += heapq.nsmallest(limite - len(resultados), candidatos, key=lambda f: f[1])
+        return resultados
+
+def buscar_estudiantes(texto, limite=20):
+    try:
+        indice = _derivado_directorio("busqueda", IndiceBusqueda)
+    except: return []
+    return indice.buscar(texto, limite)
 
 # ==========================================
 # 3. GESTIÓN DE RESULTADOS
 # ==========================================
+# Codificación de respuestas: blanco=0, A..E=1..5. Cualquier otra marca del
+# alumno se guarda como 7 (no es blanco y nunca coincide con la clave).
+OPCIONES_RESPUESTA = ["", "A", "B", "C", "D", "E"]
+NUM_PREGUNTAS = 20
+PUNTOS_CORRECTA = 5
+PUNTOS_INCORRECTA = -2  # Restamos 2 puntos
+_CODIGO_INVALIDO = 7
+
+# Formato compacto en Firestore: texto de 20 caracteres, una letra por
+# pregunta y '_' para blanco. Ej: "AB_DE_______________"
+BLANCO_COMPACTO = "_"
+_TABLA_COMPACTO = np.full(256, _CODIGO_INVALIDO, dtype=np.uint8)
+for _codigo, _letra in enumerate(BLANCO_COMPACTO + "ABCDE"):
+    _TABLA_COMPACTO[ord(_letra)] = _codigo
+_TABLA_COMPACTO[ord(" ")] = 0
+
+def compactar_respuestas(respuestas):
+    """Lista de 20 respuestas -> texto compacto de 20 caracteres."""
+    return "".join(
+        (r if r in OPCIONES_RESPUESTA else "?") if r else BLANCO_COMPACTO
+        for r in leer_respuestas(respuestas)
+    )
+
+def leer_respuestas(valor):
+    """
+    Devuelve las respuestas como lista de 20 textos. Acepta los tres formatos
+    guardados: texto compacto, lista o dict legado {'1': 'A', ..., '20': ''}.
+    """
+    if isinstance(valor, str):
+        valor = ["" if c in (BLANCO_COMPACTO, " ") else c for c in valor]
+    elif isinstance(valor, dict):
+        valor = [valor.get(str(i), "") for i in range(1, NUM_PREGUNTAS + 1)]
+    lista = [r if r else "" for r in (valor or [])][:NUM_PREGUNTAS]
+    return lista + [""] * (NUM_PREGUNTAS - len(lista))
+
+def validar_respuestas_tecleadas(texto):
+    """
+    Respuestas escritas de corrido (modo rápido) -> (lista de 20, error).
+    Acepta minúsculas y '_' o espacio como blanco; deben ser exactamente 20.
+    """
+    compacto = str(texto or "").upper().replace(" ", BLANCO_COMPACTO)
+    if len(compacto) != NUM_PREGUNTAS:
+        return None, f"Se esperaban {NUM_PREGUNTAS} respuestas y hay {len(compacto)}."
+    invalidas = sorted({c for c in compacto if c not in "ABCDE" + BLANCO_COMPACTO})
+    if invalidas:
+        return None, f"Marcas no válidas: {' '.join(invalidas)} (use A-E, y _ o espacio para blanco)."
+    return leer_respuestas(compacto), None
+
+def _texto_compacto_valido(valor):
+    return isinstance(valor, str) and len(valor) == NUM_PREGUNTAS and valor.isascii()
+
+def codificar_respuestas(respuestas, es_clave=False):
+    """Convierte respuestas (lista, dict o texto compacto) en un vector uint8."""
+    if _texto_compacto_valido(respuestas) and not es_clave:
+        return _TABLA_COMPACTO[np.frombuffer(respuestas.encode("ascii"), dtype=np.uint8)]
+    if not isinstance(respuestas, (list, tuple)):
+        respuestas = leer_respuestas(respuestas)
+    fila = np.zeros(NUM_PREGUNTAS, dtype=np.uint8)
+    for i in range(min(len(respuestas), NUM_PREGUNTAS)):
+        r = respuestas[i]
+        if not r: continue
+        try: fila[i] = OPCIONES_RESPUESTA.index(r)
+        except ValueError: fila[i] = 0 if es_clave else _CODIGO_INVALIDO
+    return fila
+
+def construir_matriz_respuestas(lista_respuestas):
+    """
+    Apila las respuestas de N alumnos en una matriz uint8 de N x 20. Los textos
+    compactos se decodifican todos juntos con una tabla (sin bucle por celda).
+    """
+    n = len(lista_respuestas)
+    compactos = [i for i, r in enumerate(lista_respuestas) if _texto_compacto_valido(r)]
+    if len(compactos) == n:
+        bloque = "".join(lista_respuestas).encode("ascii")
+        return _TABLA_COMPACTO[np.frombuffer(bloque, dtype=np.uint8)].reshape(n, NUM_PREGUNTAS)
+
+    matriz = np.zeros((n, NUM_PREGUNTAS), dtype=np.uint8)
+    if compactos:
+        bloque = "".join(lista_respuestas[i] for i in compactos).encode("ascii")
+        matriz[compactos] = _TABLA_COMPACTO[np.frombuffer(bloque, dtype=np.uint8)].reshape(-1, NUM_PREGUNTAS)
+    for i, respuestas in enumerate(lista_respuestas):
+        if not _texto_compacto_valido(respuestas):
+            matriz[i] = codificar_respuestas(respuestas)
+    return matriz
+
+def calcular_notas_lote(matriz_respuestas, patron_oficial):
+    """
+    Califica N exámenes en una sola pasada vectorizada.
+    matriz_respuestas: uint8 N x 20 (blanco=0, A..E=1..5).
+    Devuelve arrays (puntaje, correctas, incorrectas, en_blanco) de largo N,
+    con las mismas reglas que calcular_nota (+5 / -2 / 0, mínimo 0).
+    """
+    matriz = np.asarray(matriz_respuestas, dtype=np.uint8).reshape(-1, NUM_PREGUNTAS)
+    clave = patron_oficial
+    if not isinstance(clave, np.ndarray):
+        clave = codificar_respuestas(clave, es_clave=True)
+
+    blanco = matriz == 0
+    en_blanco = blanco.sum(axis=1, dtype=np.int32)
+    correctas = ((matriz == clave) & ~blanco).sum(axis=1, dtype=np.int32)
+    incorrectas = NUM_PREGUNTAS - en_blanco - correctas
+
+    puntaje = correctas * PUNTOS_CORRECTA + incorrectas * PUNTOS_INCORRECTA
+    np.maximum(puntaje, 0, out=puntaje)
+    return puntaje, correctas, incorrectas, en_blanco
+
 def calcular_nota(respuestas_alumno, patron_oficial):
     """
     CORRECTA: +5 Puntos
     INCORRECTA: -2 Puntos (Puntos en contra)
     BLANCO: 0 Puntos
+    Delegamos en calcular_notas_lote para que ambos caminos nunca difieran.
     """
-    correctas = 0
-    incorrectas = 0
-    en_blanco = 0
-    puntaje = 0
-    
-    PUNTOS_CORRECTA = 5
-    PUNTOS_INCORRECTA = -2  # Restamos 2 puntos
-    
-    for i in range(20):
-        r_alu = respuestas_alumno[i] if i < len(respuestas_alumno) else ""
-        r_pat = patron_oficial[i] if i < len(patron_oficial) else ""
-        
-        if not r_alu: # Si está vacío (Blanco)
-            en_blanco += 1
-            # No suma ni resta
-        elif r_alu == r_pat: # Correcta
-            correctas += 1
-            puntaje += PUNTOS_CORRECTA
-        else: # Incorrecta
-            incorrectas += 1
-            puntaje += PUNTOS_INCORRECTA # Esto resta 2
-            
-    if puntaje < 0: puntaje = 0
-            
+    fila = codificar_respuestas(respuestas_alumno)
+    puntajes, correctas, incorrectas, en_blanco = calcular_notas_lote(fila, patron_oficial)
+
+    puntaje = int(puntajes[0])
+    correctas = int(correctas[0])
+    incorrectas = int(incorrectas[0])
+    en_blanco = int(en_blanco[0])
+
     metricas = {
         "total_puntos": puntaje, 
         "correctas": correctas, 
@@ -125,203 +652,595 @@ def calcular_nota(respuestas_alumno, patron_oficial):
     }
     return puntaje, correctas, incorrectas, en_blanco, metricas
 
-def load_data():
-    docs = db.collection('participantes').stream()
-    return {"participants": [doc.to_dict() for doc in docs]}
+# ==========================================
+# 3.1 RECALIFICACIÓN MASIVA (CAMBIO DE CLAVE)
+# ==========================================
+TAMANO_LOTE = 450  # Firestore acepta máximo 500 escrituras por lote
+
+def recalificar_categoria(categoria, patron_oficial, al_progresar=None):
+    """
+    Recalcula las métricas de todos los participantes de una categoría con la
+    clave nueva. Solo se escriben los documentos cuyas métricas cambian (o que
+    aún no tienen 'clave_orden').
+    al_progresar(hechos, total) se llama tras cada lote confirmado.
+    Devuelve (total_revisados, total_actualizados).
+    """
+    # Que ningún examen aún en la cola quede calificado con la clave anterior
+    if not es_local(): vaciar_cola()
+    leidos = almacen_datos().leer_participantes(categoria=categoria)
+    if not leidos:
+        if al_progresar: al_progresar(0, 0)
+        return 0, 0
+
+    dnis = list(leidos)
+    registros = [leidos[dni] for dni in dnis]
+    matriz = construir_matriz_respuestas([r.get("respuestas") for r in registros])
+    puntajes, correctas, incorrectas, en_blanco = calcular_notas_lote(matriz, patron_oficial)
+
+    cambios = []
+    for n, registro in enumerate(registros):
+        metricas = {
+            "total_puntos": int(puntajes[n]),
+            "correctas": int(correctas[n]),
+            "incorrectas": int(incorrectas[n]),
+            "en_blanco": int(en_blanco[n])
+        }
+        # También completa 'clave_orden' en documentos antiguos que no la tienen
+        if registro.get("metricas") != metricas or "clave_orden" not in registro:
+            registro["metricas"] = metricas
+            registro["clave_orden"] = clave_orden(registro)
+            registro["actualizado_en"] = _marca_servidor()
+            cambios.append((dnis[n], registro))
+
+    total = len(cambios)
+    for inicio in range(0, total, TAMANO_LOTE):
+        lote = cambios[inicio:inicio + TAMANO_LOTE]
+        _escribir_participantes(lote, solo_campos=("metricas", "clave_orden", "actualizado_en"))
+        for dni, registro in lote:
+            _actualizar_participante_local(dni, registro)
+        if al_progresar: al_progresar(min(inicio + TAMANO_LOTE, total), total)
+
+    if total == 0 and al_progresar: al_progresar(0, 0)
+    return len(registros), total
+
+# ==========================================
+# 3.2 CARGA INCREMENTAL DE RESULTADOS
+# ==========================================
+# La primera carga lee toda la colección 'participantes'; las siguientes solo
+# piden los documentos con 'actualizado_en' posterior al último visto. Cada
+# cierto tiempo se hace una lectura completa para reflejar eliminaciones
+# hechas desde otro servidor.
+#
+# Solo se descargan los campos del ranking (proyección con select()); las
+# respuestas completas se piden una a una con obtener_participante().
+RESYNC_COMPLETO_SEG = 600
+ESPERA_PRIMER_SNAPSHOT_SEG = 5
+CAMPOS_RANKING = ("dni", "nombre", "colegio", "grado", "categoria", "ugel", "gestion",
+                  "docente", "metricas", "info_registro", "actualizado_en", "clave_orden")
+
+def _proyectar(datos, campos=CAMPOS_RANKING):
+    return {k: datos[k] for k in campos if k in datos}
+
+def load_data(completo=False, campos=None):
+    """
+    Participantes ya ordenados por el criterio oficial del ranking.
+    campos: columnas que usa la página (subconjunto de CAMPOS_RANKING).
+    """
+    if campos is not None:
+        extra = set(campos) - set(CAMPOS_RANKING)
+        if extra:
+            raise ValueError(f"Campos fuera del ranking {sorted(extra)}: usar obtener_participante()")
+
+    alm = obtener_almacen()
+    if not completo and _escucha_suscrita(alm):
+        # Listener recién suscrito: su primer snapshot es la lectura completa
+        alm.escucha_lista.wait(ESPERA_PRIMER_SNAPSHOT_SEG)
+    if completo or not escucha_activa():
+        _sincronizar_resultados(alm, completo)
+    # Con el listener activo la foto ya está al día: no hace falta leer nada
+    participantes = alm.participantes_ordenados()
+    if campos is not None:
+        participantes = [_proyectar(p, campos) for p in participantes]
+    return {"participants": participantes}
+
+def _plan_resultados(alm, completo=False):
+    """(es_completa, cursor): lectura completa o solo lo cambiado desde el cursor."""
+    vencida = time.time() - alm.ultima_completa > RESYNC_COMPLETO_SEG
+    es_completa = completo or vencida or alm.cursor is None
+    return es_completa, (None if es_completa else alm.cursor)
+
+def _aplicar_resultados(alm, leidos, es_completa):
+    """leidos: dni -> documento tal como llega de Firestore."""
+    cursor = alm.cursor
+    proyectados = {}
+    for dni, doc in leidos.items():
+        datos = _proyectar(doc)
+        proyectados[dni] = datos
+        marca = datos.get("actualizado_en")
+        if marca is not None and (cursor is None or marca > cursor):
+            cursor = marca
+
+    if es_completa:
+        alm.reemplazar_participantes(_con_pendientes(proyectados))
+        alm.ultima_completa = time.time()
+    else:
+        for dni, datos in proyectados.items():
+            alm.poner_participante(dni, datos)
+    # Si aún ningún documento tiene marca, las deltas parten desde 1970
+    alm.cursor = cursor or datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+def _sincronizar_resultados(alm, completo):
+    with alm.lock:
+        es_completa, cursor = _plan_resultados(alm, completo)
+        leidos = almacen_datos().leer_participantes(CAMPOS_RANKING, desde=cursor)
+        _aplicar_resultados(alm, leidos, es_completa)
+
+def obtener_participante(dni):
+    """Documento completo (con respuestas) de un participante, o None."""
+    dni = normalizar_dni(dni)
+    if not es_local():
+        hay_pendiente, registro = obtener_cola().buscar_pendiente(dni)
+        if hay_pendiente: return registro
+    return almacen_datos().leer_participante(dni)
+
+def participante_conocido(dni):
+    """
+    ¿El DNI ya tiene un examen guardado? Solo mira la cola y los resultados en
+    memoria (o el SQLite local): nunca espera a la red, así que en un proceso
+    recién iniciado puede responder False aunque exista en Firestore.
+    """
+    dni = normalizar_dni(dni)
+    if es_local():
+        return almacen_datos().leer_participante(dni) is not None
+    hay_pendiente, registro = obtener_cola().buscar_pendiente(dni)
+    if hay_pendiente: return registro is not None
+    alm = obtener_almacen()
+    with alm.lock:
+        return dni in alm.participantes
+
+def _actualizar_participante_local(dni, registro):
+    local = _proyectar(registro)
+    local["actualizado_en"] = datetime.now(pytz.utc)
+    obtener_almacen().poner_participante(dni, local)
+
+def eliminar_participante(dni):
+    dni = str(dni).strip()
+    # Por la cola, para que no se adelante a un registro aún pendiente del mismo DNI
+    _escribir_participantes([(dni, None)], diferido=True)
+    obtener_almacen().quitar_participante(dni)
+
+def _asegurar_resultados(alm):
+    """Carga los resultados si este proceso aún no los leyó (ni hay listener)."""
+    if not resultados_en_memoria():
+        _sincronizar_resultados(alm, False)
+
+def ranking(categoria=None, grado=None, inicio=0, cantidad=None):
+    """Página del ranking (lista de participantes) sin reordenar."""
+    alm = obtener_almacen()
+    _asegurar_resultados(alm)
+    with alm.lock:
+        return [alm.participantes[dni] for dni in alm.indice.pagina(inicio, cantidad, categoria, grado)]
+
+def resultados_en_memoria():
+    """¿Este proceso ya tiene los resultados (carga previa o listener activo)?"""
+    return obtener_almacen().cursor is not None or escucha_activa()
+
+def posicion_en_ranking(dni, categoria=None, grado=None):
+    """
+    Puesto del DNI, o None si los resultados aún no están en memoria: nunca
+    descarga 'participantes' solo para mostrar un puesto (Editar).
+    """
+    if not resultados_en_memoria(): return None
+    alm = obtener_almacen()
+    with alm.lock:
+        return alm.indice.posicion(str(dni).strip(), categoria, grado)
+
+# ==========================================
+# 3.3 RESULTADOS EN TIEMPO REAL (LISTENER)
+# ==========================================
+# Un único listener por proceso aplica altas/cambios/bajas de 'participantes'
+# sobre el almacén compartido. Las páginas consultan version_resultados()
+# (sin red) y solo se redibujan cuando cambió. Con FIRESTORE_EMULATOR_HOST
+# definido se conecta al emulador local.
+def _al_cambiar_participantes(alm, snapshots, cambios, momento):
+    with alm.lock:
+        if not alm.escucha_lista.is_set():
+            # Primer snapshot: es la colección completa
+            alm.reemplazar_participantes(_con_pendientes({doc.id: _proyectar(doc.to_dict()) for doc in snapshots}))
+        else:
+            for cambio in cambios:
+                doc = cambio.document
+                if cambio.type.name == 'REMOVED':
+                    alm.quitar_participante(doc.id)
+                else:
+                    alm.poner_participante(doc.id, _proyectar(doc.to_dict()))
+        # Dentro del lock: aplicar_precarga nunca ve la foto nueva sin la marca
+        alm.escucha_lista.set()
+
+def iniciar_escucha_resultados(espera_seg=5):
+    """Suscribe el listener de 'participantes' si aún no hay uno activo."""
+    if es_local(): return False  # el almacén local no tiene listener: load_data lee deltas
+    alm = obtener_almacen()
+    with alm.lock:
+        if _escucha_suscrita(alm):
+            return True
+        alm.escucha_lista.clear()
+        try:
+            alm.escucha = obtener_db().collection('participantes').on_snapshot(
+                functools.partial(_al_cambiar_participantes, alm))
+        except Exception as e:
+            print(f"Aviso: no se pudo iniciar el listener de resultados: {e}")
+            alm.escucha = None
+            return False
+    return alm.escucha_lista.wait(espera_seg)
+
+def _escucha_suscrita(alm):
+    """Hay un listener suscrito (aunque su primer snapshot aún no haya llegado)."""
+    return alm.escucha is not None and alm.escucha.is_active
+
+def escucha_activa():
+    alm = obtener_almacen()
+    return alm.escucha is not None and alm.escucha.is_active and alm.escucha_lista.is_set()
+
+def version_resultados():
+    return obtener_almacen().version_resultados
+
+# ==========================================
+# 3.4 CONSULTAS PAGINADAS EN EL SERVIDOR
+# ==========================================
+# Para quien solo revisa una categoría/grado: el filtro y el orden se resuelven
+# en Firestore (índices compuestos en firestore.indexes.json) y se descarga
+# una página a la vez. El cursor es el último documento de la página anterior.
+def consultar_ranking(categoria=None, grado=None, tamano=50, despues_de=None):
+    """Devuelve (filas, cursor_siguiente); cursor_siguiente es None en la última página."""
+    return almacen_datos().consultar_ranking(categoria, grado, tamano, despues_de, CAMPOS_RANKING)
+
+# ==========================================
+# 3.5 PRECARGA CONCURRENTE
+# ==========================================
+# datos_async lee en paralelo lo que falta (directorio, resultados y clave) y lo
+# deja aquí; después cargar_mapa_directorio, load_data y cargar_configuracion
+# responden desde memoria sin volver a la red.
+def planificar_precarga():
+    """Qué lecturas faltan: {'directorio': bool, 'resultados': None | (es_completa, cursor), 'configuracion': bool}."""
+    if es_local():
+        return {"directorio": False, "resultados": None, "configuracion": False}
+    alm = obtener_almacen()
+    with alm.lock:
+        plan = {
+            "directorio": alm.directorio is None,
+            # Con listener suscrito, los resultados llegan por él: no leerlos dos veces
+            "resultados": None if _escucha_suscrita(alm) else _plan_resultados(alm),
+        }
+    with _lock_claves:
+        plan["configuracion"] = _cache_claves["config"] is None
+    return plan
+
+def aplicar_precarga(directorio=None, resultados=None, es_completa=True, configuracion=None):
+    """Guarda en memoria lo leído por la precarga (None = no se leyó)."""
+    alm = obtener_almacen()
+    with alm.lock:
+        if directorio is not None and alm.directorio is None:
+            alm.directorio = directorio
+            alm.directorio_pendientes.clear()
+            alm.version_directorio += 1
+        if resultados is not None and not _escucha_suscrita(alm):
+            _aplicar_resultados(alm, resultados, es_completa)
+    if configuracion is not None:
+        with _lock_claves:
+            if _cache_claves["config"] is None: _cache_claves["config"] = configuracion
+        _escuchar_configuracion()
+
+# ==========================================
+# 3.6 COLA DE ESCRITURA DIFERIDA
+# ==========================================
+# guardar_alumno no espera a Firestore: deja el registro en una cola SQLite
+# local y un hilo de fondo lo sube por lotes (ver cola_registros.py).
+RUTA_COLA = os.environ.get("CERM_COLA_DB", "cola_registros.db")
+
+def _enviar_lote_cola(lote):
+    db = obtener_db()
+    if db is None:
+        raise RuntimeError("Sin conexión a Firestore")
+    batch = db.batch()
+    for coleccion, doc_id, registro in lote:
+        ref = db.collection(coleccion).document(doc_id)
+        if registro is None:
+            batch.delete(ref)
+        elif coleccion == 'participantes':
+            batch.set(ref, {**registro, "actualizado_en": _marca_servidor()})
+        else:
+            batch.set(ref, registro)
+    batch.commit()
+
+@st.cache_resource
+def obtener_cola():
+    return ColaRegistros(RUTA_COLA, _enviar_lote_cola).iniciar()
+
+def estado_cola():
+    """Pendientes, enviados, hora del último envío y último error de la cola."""
+    return obtener_cola().estado()
+
+def vaciar_cola():
+    """
+    Sube ya todo lo pendiente (lanza excepción si Firestore no responde). Si el
+    hilo de fondo está enviando un lote, espera a que termine (lock_envio).
+    """
+    cola = obtener_cola()
+    while cola.vaciar_una_vez(): pass
+
+def _replicar(coleccion, doc_id, registro):
+    """En modo local, deja en la cola la copia para Firestore."""
+    if es_local(): obtener_cola().poner(doc_id, registro, coleccion)
+
+def _escribir_participantes(lote, solo_campos=None, diferido=False):
+    """
+    Escribe lote = [(dni, registro | None)] en el almacén principal. En modo
+    local (y en Firestore con diferido=True) lo que va a la nube sale por la
+    cola; la marca 'actualizado_en' se pone al subir.
+    """
+    if es_local():
+        almacen_datos().escribir_participantes(lote, solo_campos)
+    elif not diferido:
+        almacen_datos().escribir_participantes(lote, solo_campos)
+        return
+    cola = obtener_cola()
+    for dni, registro in lote:
+        cola.poner(dni, None if registro is None else {k: v for k, v in registro.items() if k != "actualizado_en"})
+
+def _con_pendientes(participantes):
+    """Superpone lo que sigue en la cola sobre una foto completa leída de Firestore."""
+    if es_local(): return participantes  # el almacén local ya los tiene
+    for dni, registro in obtener_cola().pendientes().items():
+        if registro is None: participantes.pop(dni, None)
+        else: participantes[dni] = _proyectar(registro)
+    return participantes
+
+def _copiar_desde_nube(local):
+    remoto = _remoto()
+    if remoto is None:
+        raise RuntimeError("Sin conexión a Firestore")
+    cola = obtener_cola()
+    config = remoto.leer_configuracion()
+    if config is not None and not cola.buscar_pendiente(DOC_CONFIGURACION, 'configuracion')[0]:
+        local.guardar_configuracion(config)
+    local.guardar_directorio(remoto.leer_directorio(), reemplazar=True)
+    # Lo que aún no se subió manda sobre la copia de la nube
+    local.reemplazar_participantes(remoto.leer_participantes(), conservar=cola.pendientes().keys())
+
+def sincronizar_desde_nube():
+    """Modo local: trae de Firestore la clave, el padrón y los participantes."""
+    if not es_local(): return False
+    _copiar_desde_nube(almacen_datos())
+    invalidar_configuracion()
+    invalidar_directorio()
+    alm = obtener_almacen()
+    with alm.lock:
+        alm.cursor = None  # la próxima carga vuelve a leer todo del almacén local
+    return True
+
+def construir_registro(datos):
+    """Documento de 'participantes' a partir de los datos del formulario."""
+    dni = str(datos['alumno']['dni'])
+    registro = {
+        "dni": dni,
+        "nombre": datos['alumno']['nombres'],
+        "colegio": datos['alumno']['colegio'],
+        "grado": datos['alumno']['grado'],
+        "categoria": datos['alumno']['categoria'],
+        "ugel": datos['alumno']['ugel'],
+        "gestion": datos['alumno']['gestion'],
+        "docente": datos['alumno'].get('docente', 'No registrado'),
+        "metricas": datos['metricas'],
+        "info_registro": datos['info_registro'],
+        "respuestas": compactar_respuestas(datos['examen']['respuestas']),
+        "actualizado_en": _marca_servidor()
+    }
+    registro["clave_orden"] = clave_orden(registro)
+    return registro
 
 def guardar_alumno(datos):
     try:
-        dni = str(datos['alumno']['dni'])
         # Asegurar campos
         datos['alumno']['docente'] = datos['alumno'].get('docente', 'No registrado')
-        
-        registro = {
-            "dni": dni,
-            "nombre": datos['alumno']['nombres'],
-            "colegio": datos['alumno']['colegio'],
-            "grado": datos['alumno']['grado'],
-            "categoria": datos['alumno']['categoria'],
-            "ugel": datos['alumno']['ugel'],
-            "gestion": datos['alumno']['gestion'],
-            "docente": datos['alumno']['docente'],
-            "metricas": datos['metricas'],
-            "info_registro": datos['info_registro'],
-            "respuestas": datos['examen']['respuestas']
-        }
-        db.collection('participantes').document(dni).set(registro)
+        registro = construir_registro(datos)
+        dni = registro["dni"]
+        _escribir_participantes([(dni, registro)], diferido=True)
+        _actualizar_participante_local(dni, registro)
         return True
     except Exception as e:
         print(f"Error: {e}")
         return False
 
 # ==========================================
-# 4. REPORTES PDF (ACTUALIZADO)
+# 3.7 IMPORTACIÓN MASIVA DE HOJAS DE RESPUESTAS
 # ==========================================
-def generar_reporte_pdf(df_resultados):
-    class PDF(FPDF):
-        def header(self):
-            self.set_font('Arial', 'B', 10)
-            self.cell(0, 10, 'Sistema de Evaluacion CERM 2025 - Reporte Oficial', 0, 1, 'R')
-            self.ln(5)
-
-    pdf = PDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # REPORTE 1: TOP 20
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "TOP 20 MEJORES ALUMNOS POR CATEGORIA", ln=True, align='C')
-    pdf.ln(5)
-    
-    categorias = ["CAT 1", "CAT 2", "CAT 3"]
-    
-    for cat in categorias:
-        pdf.set_font("Arial", "B", 12)
-        pdf.set_fill_color(220, 230, 255)
-        pdf.cell(0, 10, f"CATEGORIA {cat}", ln=True, fill=True)
-        
-        if not df_resultados.empty and "Categoría" in df_resultados.columns:
-            top = df_resultados[df_resultados["Categoría"] == cat]
-            
-            # --- CRITERIO DE ORDENAMIENTO EXACTO ---
-            # 1. Puntaje (Mayor a menor)
-            # 2. Correctas (Mayor a menor)
-            # 3. Hora (Menor a mayor = Más temprano gana)
-            if "Hora" in top.columns:
-                top = top.sort_values(by=["Puntaje", "Correctas", "Hora"], ascending=[False, False, True]).head(20)
-            else:
-                top = top.sort_values(by=["Puntaje", "Correctas"], ascending=[False, False]).head(20)
-            
-            # Encabezados de Tabla (Ancho Total A4 útil ~180-190)
-            pdf.set_font("Arial", "B", 9)
-            pdf.cell(10, 8, "No.", 1, align='C')
-            pdf.cell(65, 8, "Estudiante", 1)  # Reducido un poco para dar espacio a hora
-            pdf.cell(65, 8, "Colegio", 1)     # Reducido un poco para dar espacio a hora
-            pdf.cell(20, 8, "Pts", 1, align='C')
-            pdf.cell(25, 8, "Hora", 1, align='C') # NUEVA COLUMNA
-            pdf.ln()
-            
-            pdf.set_font("Arial", "", 9)
-            rank = 1
-            for _, row in top.iterrows():
-                est = str(row.get("Estudiante","")).encode('latin-1', 'replace').decode('latin-1')
-                col = str(row.get("Colegio","")).encode('latin-1', 'replace').decode('latin-1')
-                hora = str(row.get("Hora", "--:--"))
-                
-                pdf.cell(10, 6, str(rank), 1, align='C')
-                pdf.cell(65, 6, est[:35], 1) # Cortamos texto si es muy largo
-                pdf.cell(65, 6, col[:35], 1)
-                pdf.cell(20, 6, str(row.get("Puntaje",0)), 1, align='C')
-                pdf.cell(25, 6, hora, 1, align='C')
-                pdf.ln()
-                rank += 1
-        pdf.ln(5)
-        
-    # REPORTE 2: CAMPEÓN
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "RECONOCIMIENTO INSTITUCIONAL", ln=True, align='C')
-    pdf.ln(5)
-    
+# Archivo CSV/XLSX con DNI + 20 respuestas + hora de entrega. Las respuestas
+# pueden venir en una columna 'respuestas' (texto de 20 caracteres, '_' o
+# espacio = blanco) o en columnas P1..P20. Los datos del alumno se toman del
+# padrón y todo se califica con calcular_notas_lote.
+_BLANCOS_ARCHIVO = {"": "_", " ": "_", "-": "_", ".": "_", "NAN": "_"}
+
+def leer_archivo_respuestas(archivo, nombre_archivo=None):
+    import pandas as pd
+    nombre = str(nombre_archivo or getattr(archivo, "name", archivo)).lower()
+    if nombre.endswith((".xlsx", ".xls")):
+        return pd.read_excel(archivo, dtype=str)
+    return pd.read_csv(archivo, sep=None, engine="python", dtype=str, encoding="utf-8-sig")
+
+def _columnas_hoja(df):
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    col_dni = cols.get("dni") or cols.get("número de dni") or cols.get("numero de dni")
+    col_hora = cols.get("hora_entrega") or cols.get("hora")
+    col_resp = cols.get("respuestas")
+    cols_p = []
+    if col_resp is None:
+        for i in range(1, NUM_PREGUNTAS + 1):
+            c = cols.get(f"p{i}") or cols.get(str(i))
+            if c is None: break
+            cols_p.append(c)
+        if len(cols_p) != NUM_PREGUNTAS: cols_p = []
+    return col_dni, col_hora, col_resp, cols_p
+
+def _normalizar_hora(serie):
+    """(hora 'HH:MM[:SS]', es_hora_real, dentro_del_horario) por fila."""
+    partes = serie.fillna("").astype(str).str.strip().str.extract(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+    h, m, s = (partes[i].fillna("0").astype(int) for i in range(3))
+    valida = partes[0].notna() & (h < 24) & (m < 60) & (s < 60)
+    hora = partes[0].str.zfill(2) + ":" + partes[1]
+    hora = hora.where(partes[2].isna(), hora + ":" + partes[2]).where(valida, "")
+    inicio, fin = (_segundos_hora(x) for x in HORARIO_ENTREGA)
+    segundos = h * 3600 + m * 60 + s
+    return hora, valida, valida & (segundos >= inicio) & (segundos <= fin)
+
+def preparar_importacion(df_hojas):
+    """
+    Valida, califica y compara con lo ya guardado (simulación, no escribe).
+    Devuelve (registros, reporte): registros = {dni: documento} a escribir y
+    reporte = DataFrame con el estado de cada fila:
+    'Nuevo', 'Actualiza', 'Sin cambios' o 'Error'.
+    """
+    col_dni, col_hora, col_resp, cols_p = _columnas_hoja(df_hojas)
+    if col_dni is None or col_hora is None or (col_resp is None and not cols_p):
+        raise ValueError("El archivo debe tener columnas DNI, Hora y 'Respuestas' (o P1..P20).")
+
+    # --- Limpieza vectorizada ---
+    import pandas as pd
+    hojas = pd.DataFrame({"DNI": df_hojas[col_dni].map(normalizar_dni)})
+    if col_resp is not None:
+        texto = df_hojas[col_resp].fillna("").astype(str).str.upper().str.replace(r"[ \-\.]", "_", regex=True)
+        hojas["Respuestas"] = texto
+        largo_ok = texto.str.len() == NUM_PREGUNTAS  # una marca faltante es un error, no un blanco
+    else:
+        celdas = [df_hojas[c].fillna("").astype(str).str.strip().str.upper().replace(_BLANCOS_ARCHIVO) for c in cols_p]
+        hojas["Respuestas"] = celdas[0].str.cat(celdas[1:])
+        largo_ok = hojas["Respuestas"].str.len() == NUM_PREGUNTAS
+    hojas["Hora"], hora_ok, en_horario = _normalizar_hora(df_hojas[col_hora])
+
+    mapa = cargar_mapa_directorio()
+    config = cargar_configuracion()
+    hojas["Estado"] = "Error"
+    hojas["Detalle"] = ""
+    respuestas_ok = largo_ok & hojas["Respuestas"].str.fullmatch(r"[ABCDE_]{20}")
+    en_padron = hojas["DNI"].isin(mapa.keys())
+    duplicado = hojas["DNI"].duplicated(keep="last")
+    hojas.loc[~respuestas_ok, "Detalle"] = "Respuestas inválidas (20 marcas A-E o '_')"
+    hojas.loc[~largo_ok, "Detalle"] = f"Respuestas incompletas o de más (deben ser {NUM_PREGUNTAS} marcas)"
+    hojas.loc[~en_horario, "Detalle"] = f"Hora fuera del horario de entrega ({HORARIO_ENTREGA[0]} a {HORARIO_ENTREGA[1]})"
+    hojas.loc[~hora_ok, "Detalle"] = "Hora inválida (HH:MM)"
+    hojas.loc[~en_padron, "Detalle"] = "DNI no está en el padrón"
+    hojas.loc[duplicado, "Detalle"] = "DNI repetido en el archivo (se usa la última fila)"
+    validas = respuestas_ok & en_horario & en_padron & ~duplicado
+
+    info = [mapa.get(d, {}) for d in hojas["DNI"]]
+    hojas["Estudiante"] = [r.get("nombre_completo", "") for r in info]
+    hojas["Categoría"] = [r.get("categoria", "") for r in info]
+    for campo in ("Puntaje", "Correctas", "Incorrectas", "En Blanco"):
+        hojas[campo] = 0
+
+    # --- Calificación por categoría (una pasada vectorizada cada una) ---
+    for cat, grupo in hojas[validas].groupby("Categoría"):
+        patron = config.get(cat)
+        if not patron or not any(patron):
+            hojas.loc[grupo.index, "Detalle"] = f"Falta la clave de {cat} en Configuración"
+            validas[grupo.index] = False
+            continue
+        matriz = construir_matriz_respuestas(grupo["Respuestas"].tolist())
+        puntajes, correctas, incorrectas, en_blanco = calcular_notas_lote(matriz, patron)
+        hojas.loc[grupo.index, "Puntaje"] = puntajes
+        hojas.loc[grupo.index, "Correctas"] = correctas
+        hojas.loc[grupo.index, "Incorrectas"] = incorrectas
+        hojas.loc[grupo.index, "En Blanco"] = en_blanco
+
+    # --- Diferencias con lo ya registrado ---
+    dnis = hojas.loc[validas, "DNI"].tolist()
+    existentes = {}
+    for inicio in range(0, len(dnis), TAMANO_LOTE):
+        existentes.update(almacen_datos().leer_participantes(
+            ("respuestas", "info_registro"), dnis=dnis[inicio:inicio + TAMANO_LOTE]))
+
+    registros = {}
+    for i in hojas.index[validas]:
+        fila = hojas.loc[i]
+        dni = fila["DNI"]
+        previo = existentes.get(dni)
+        if previo is not None and compactar_respuestas(previo.get("respuestas")) == fila["Respuestas"] \
+                and (previo.get("info_registro") or {}).get("hora_entrega") == fila["Hora"]:
+            hojas.at[i, "Estado"] = "Sin cambios"
+            continue
+        hojas.at[i, "Estado"] = "Actualiza" if previo is not None else "Nuevo"
+        alumno = mapa[dni]
+        registros[dni] = construir_registro({
+            "alumno": {
+                "dni": dni, "nombres": alumno["nombre_completo"], "colegio": alumno["institucion"],
+                "grado": alumno["grado"], "categoria": alumno["categoria"],
+                "ugel": alumno["ugel"], "gestion": alumno["gestion"], "docente": alumno["docente"]
+            },
+            "examen": {"respuestas": leer_respuestas(fila["Respuestas"])},
+            "metricas": {
+                "total_puntos": int(fila["Puntaje"]), "correctas": int(fila["Correctas"]),
+                "incorrectas": int(fila["Incorrectas"]), "en_blanco": int(fila["En Blanco"])
+            },
+            "info_registro": {"hora_entrega": fila["Hora"]}
+        })
+
+    columnas = ["DNI", "Estudiante", "Categoría", "Puntaje", "Correctas", "Incorrectas", "En Blanco", "Hora", "Estado", "Detalle"]
+    return registros, hojas[columnas]
+
+def confirmar_importacion(registros, al_progresar=None):
+    """Escribe los registros preparados en lotes de TAMANO_LOTE. Devuelve cuántos se guardaron."""
+    if not es_local(): vaciar_cola()  # un registro manual pendiente no debe pisar después lo importado
+    pendientes = list(registros.items())
+    total = len(pendientes)
+    for inicio in range(0, total, TAMANO_LOTE):
+        lote = pendientes[inicio:inicio + TAMANO_LOTE]
+        _escribir_participantes(lote)
+        for dni, registro in lote:
+            _actualizar_participante_local(dni, registro)
+        if al_progresar: al_progresar(min(inicio + TAMANO_LOTE, total), total)
+    return total
+
+# ==========================================
+# 4. REPORTES PDF (CACHE LRU POR HUELLA)
+# ==========================================
+# La construcción de los PDF vive en reportes.py. Aquí solo se memorizan en
+# memoria por la huella de las filas del ranking + filtros.
+MAX_REPORTES_CACHE = 8
+_cache_reportes = OrderedDict()
+_lock_reportes = threading.Lock()
+
+def huella_reporte(df_resultados, filtros=None):
+    h = hashlib.sha1(repr((list(df_resultados.columns), filtros)).encode("utf-8"))
     if not df_resultados.empty:
-        camp = df_resultados.groupby("Colegio")["Puntaje"].sum().reset_index()
-        camp = camp.sort_values(by="Puntaje", ascending=False)
-        
-        if not camp.empty:
-            ganador = camp.iloc[0]
-            col_ganador = str(ganador['Colegio']).encode('latin-1', 'replace').decode('latin-1')
-            
-            pdf.set_fill_color(255, 215, 0)
-            pdf.rect(10, pdf.get_y(), 190, 40, 'F')
-            pdf.set_y(pdf.get_y() + 5)
-            
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(0, 8, f"CAMPEON REGIONAL DE MATEMATICA 2025", ln=True, align='C')
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 8, "(Gallardete de Honor)", ln=True, align='C')
-            pdf.set_font("Arial", "B", 16)
-            pdf.cell(0, 10, f"{col_ganador}", ln=True, align='C')
-            pdf.set_font("Arial", "", 12)
-            pdf.cell(0, 8, f"PUNTAJE ACUMULADO: {ganador['Puntaje']} Puntos", ln=True, align='C')
-            pdf.ln(15)
-            
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(0, 10, "MENCION HONORIFICA", ln=True, align='C')
-            
-            if len(camp) > 1:
-                seg = camp.iloc[1]
-                c2 = str(seg['Colegio']).encode('latin-1', 'replace').decode('latin-1')
-                pdf.set_fill_color(220, 220, 220)
-                pdf.cell(0, 10, f"2do Puesto: {c2} ({seg['Puntaje']} pts)", ln=True, fill=True, align='C')
-            
-            if len(camp) > 2:
-                ter = camp.iloc[2]
-                c3 = str(ter['Colegio']).encode('latin-1', 'replace').decode('latin-1')
-                pdf.set_fill_color(205, 127, 50)
-                pdf.cell(0, 10, f"3er Puesto: {c3} ({ter['Puntaje']} pts)", ln=True, fill=True, align='C')
-            pdf.ln(10)
-
-    # REPORTE 3: DOCENTES
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "RECONOCIMIENTO DOCENTE", ln=True, align='C')
-    pdf.ln(5)
-    
-    pdf.set_font("Arial", "", 11)
-    txt = ("Se otorgara Resolucion Directoral Regional de reconocimiento y "
-           "felicitacion a los docentes asesores de los estudiantes que ocupen "
-           "los tres primeros puestos en cada categoria.")
-    pdf.multi_cell(0, 6, txt, 0, 'C')
-    pdf.ln(10)
-    
-    for cat in categorias:
-        pdf.set_font("Arial", "B", 12)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_fill_color(0, 51, 102)
-        pdf.cell(0, 10, f" CATEGORIA {cat}", ln=True, fill=True)
-        pdf.set_text_color(0, 0, 0)
-        
-        if not df_resultados.empty:
-            # Reutilizamos el mismo criterio de ordenamiento para los docentes
-            if "Hora" in df_resultados.columns:
-                 top3 = df_resultados[df_resultados["Categoría"] == cat].sort_values(
-                     by=["Puntaje", "Correctas", "Hora"], 
-                     ascending=[False, False, True]
-                 ).head(3)
-            else:
-                 top3 = df_resultados[df_resultados["Categoría"] == cat].sort_values(
-                     by=["Puntaje", "Correctas"], 
-                     ascending=[False, False]
-                 ).head(3)
-
-            puesto = 1
-            for _, row in top3.iterrows():
-                doc = str(row.get("Docente", "No registrado")).encode('latin-1', 'replace').decode('latin-1')
-                est = str(row.get("Estudiante", "")).encode('latin-1', 'replace').decode('latin-1')
-                col = str(row.get("Colegio", "")).encode('latin-1', 'replace').decode('latin-1')
-                
-                pdf.ln(2)
-                pdf.set_font("Arial", "B", 11)
-                pdf.set_fill_color(240, 240, 240)
-                pdf.cell(20, 8, f"{puesto} Puesto", 0, 0, fill=True)
-                pdf.set_font("Arial", "", 11)
-                pdf.cell(0, 8, f"  Alumno: {est}", 0, 1, fill=True)
-                pdf.set_text_color(0, 100, 0)
-                pdf.set_font("Arial", "B", 11)
-                pdf.cell(20, 6, "", 0)
-                pdf.cell(0, 6, f"DOCENTE ASESOR: {doc}", 0, 1)
-                pdf.set_text_color(0,0,0)
-                pdf.set_font("Arial", "I", 10)
-                pdf.cell(20, 5, "", 0)
-                pdf.cell(0, 5, f"Institucion: {col}", 0, 1)
-                pdf.ln(2)
-                pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-                puesto += 1
-        pdf.ln(5)
-
-    nombre = "Reporte_Oficial_CERM_2025.pdf"
-    pdf.output(nombre)
-    return nombre
+        import pandas as pd
+        h.update(pd.util.hash_pandas_object(df_resultados, index=True).values.tobytes())
+    return h.hexdigest()
+
+def _memorizar_reporte(clave, generar):
+    with _lock_reportes:
+        if clave in _cache_reportes:
+            _cache_reportes.move_to_end(clave)
+            return _cache_reportes[clave]
+
+    contenido = generar()
+
+    with _lock_reportes:
+        _cache_reportes[clave] = contenido
+        while len(_cache_reportes) > MAX_REPORTES_CACHE:
+            _cache_reportes.popitem(last=False)
+    return contenido
+
+def obtener_reporte_pdf(df_resultados, filtros=None):
+    """Devuelve el PDF (bytes) del ranking, reutilizando el cache si los datos no cambiaron."""
+    clave = huella_reporte(df_resultados, filtros)
+    from reportes import generar_reporte_pdf_bytes
+    return _memorizar_reporte(clave, lambda: generar_reporte_pdf_bytes(df_resultados))
+
+def obtener_reportes_por_grupo(df_resultados, columna="Colegio"):
+    """ZIP con un PDF por colegio o UGEL (generado en paralelo, ver reportes.py)."""
+    clave = huella_reporte(df_resultados, ("por_grupo", columna))
+    from reportes import generar_reportes_por_grupo
+    return _memorizar_reporte(clave, lambda: generar_reportes_por_grupo(df_resultados, columna))
 
 # ==========================================
 # 5. SEGURIDAD (LOGIN GLOBAL)
@@ -346,4 +1265,6 @@ def check_password():
                 st.rerun()
             else:
                 st.error("🚫 Clave incorrecta")
-    return False
\ No newline at end of file
+    return False
+
+registrar_arranque("Importar utils", time.perf_counter() - _INICIO_IMPORTACION)